@@ -64,14 +64,18 @@ class Invaders(GameApp):
     #
     # Attribute _text: the currently active message
     # Invariant: _text is a GLabel object, or None if there is no message to
-    # display. It is onl None if _state is STATE_ACTIVE.
+    # display. It is onl None if _state is STATE_ACTIVE. It is in the view
+    # (see GView.add) whenever it is not None.
     #
     # You may have new attributes if you wish (you might want an attribute to
     # store any score across multiple waves). But you must document them.
     # LIST MORE ATTRIBUTES (AND THEIR INVARIANTS) HERE IF NECESSARY
     #
     #Attribute  _pausetxt: pause text to display on screen while game is running
-    #Invariant: _pausetxt is a GLabel object
+    #Invariant: _pausetxt is a GLabel object, or None if it is not shown
+    #
+    #Attribute _hud: the text that stays on screen while playing, rendered offscreen
+    #Invariant: _hud is a GLayer object covering the window, containing _pausetxt
     # DO NOT MAKE A NEW INITIALIZER!
 
     # THREE MAIN GAMEAPP METHODS
@@ -91,14 +95,19 @@ class Invaders(GameApp):
         """
         # IMPLEMENT ME
         ##self._text= GLabel(text="Press 'S' to Play",font_name="ComicSans.ttf",font_size=64)
+        # Sort the draw list by texture and color; messages stay on top in TEXT_LAYER
+        self.view.sorting=True
         self._state=STATE_INACTIVE
         self._wave=None
-        self._text=GLabel(text="Press 'S' to Play",font_name="ComicSans.ttf",font_size=64)
-        self._text.x= GAME_WIDTH/2 - self._text.width/2
-        self._text.y= GAME_HEIGHT/2 + self._text.height/2
-        self._pausetxt= GLabel(text="Press 'P' to Pause ",font_name="ComicSans.ttf",font_size=30)
+        self._text=None
+        self._message("Press 'S' to Play")
+        self._pausetxt= GLabel(text="Press 'P' to Pause ",font_name="ComicSans.ttf",font_size=30,layer=TEXT_LAYER)
         self._pausetxt.x=0.85*GAME_WIDTH- self._pausetxt.width
         self._pausetxt.y=0.95*GAME_HEIGHT- self._pausetxt.height
+        self._hud=GLayer(left=0,bottom=0,width=GAME_WIDTH,height=GAME_HEIGHT,\
+        children=[self._pausetxt],layer=TEXT_LAYER)
+        # The messages and the wave stay in the view until removed
+        self.view.add(self._hud)
 
         if self._state==STATE_INACTIVE:
             self._wave= Wave()
@@ -162,17 +171,15 @@ class Invaders(GameApp):
         self._determineState()
 
         if self._state== STATE_INACTIVE:
-            self._text=GLabel(text="Press 'S' to Play",\
-            font_name="ComicSans.ttf",font_size=64)
-            self._text.x= GAME_WIDTH/2 - self._text.width/2
-            self._text.y= GAME_HEIGHT/2 + self._text.height/2
+            self._message("Press 'S' to Play")
 
         if self._state== STATE_INACTIVE and self.input.is_key_pressed('s'):
             self._state=STATE_NEWWAVE
-            self._text=None
+            self._message(None)
 
         if self._state==STATE_NEWWAVE:
             self._wave=Wave()
+            self._wave.show(self.view)
             self._state=STATE_ACTIVE
 
         self.stateactive(dt)
@@ -180,7 +187,7 @@ class Invaders(GameApp):
 
         if self.input.is_key_pressed('s') and self._state== STATE_PAUSED:
             self._state=STATE_CONTINUE
-            self._text=None
+            self._message(None)
         if self._state== STATE_CONTINUE:
             self._state=STATE_ACTIVE
             self._wave.createship()
@@ -188,6 +195,8 @@ class Invaders(GameApp):
             self.gameover()
         if self._wave.getGameover():
             self.gameover()
+        # Nothing moves while waiting for a key, so draw fewer frames
+        self.idle=self._state in (STATE_INACTIVE,STATE_PAUSED,STATE_COMPLETE)
 
     def draw(self):
         """
@@ -204,13 +213,9 @@ class Invaders(GameApp):
         from class.
         """
         # IMPLEMENT ME
-        if self._state!=STATE_ACTIVE:
-            if self._text is not None:
-                self._text.draw(self.view)
+        # The messages and the wave are in the view; only the wave animates
         if self._state==STATE_ACTIVE or self._state==STATE_PAUSED:
             self._wave.draw(self.view)
-        if self._pausetxt is not None:
-            self._pausetxt.draw(self.view)
     # HELPER METHODS FOR THE STATES GO HERE
     def _determineState(self):
         '''
@@ -223,30 +228,42 @@ class Invaders(GameApp):
             elif self._wave.getShip().x> GAME_WIDTH- SHIP_WIDTH/2:
                 self._wave.getShip().x = GAME_WIDTH- SHIP_WIDTH/2
 
+    #Helper method for showing a message in the middle of the window
+    def _message(self,text):
+        '''
+        Shows the given message, replacing the current one in _text.
+
+        The message is only made again if the text changed.
+
+        Parameter text: the message to show, or None to show no message
+        Precondition: text is a string or None
+        '''
+        if self._text is not None and self._text.text != text:
+            self.view.remove(self._text)
+            self._text=None
+        if text is not None and self._text is None:
+            self._text=GLabel(text=text,font_name="ComicSans.ttf",font_size=64,layer=TEXT_LAYER)
+            self._text.x= GAME_WIDTH/2 - self._text.width/2
+            self._text.y= GAME_HEIGHT/2 + self._text.height/2
+            self.view.add(self._text)
+
     #Helper method for gameover message
     def gameover(self):
+        self._state= STATE_COMPLETE
         if self._wave.getWinner():
-            self._state= STATE_COMPLETE
-            self._text= GLabel(text="CONGRATS YOU WON",font_name="ComicSans.ttf",font_size=64)
-            self._text.x= GAME_WIDTH/2 - self._text.width/2
-            self._text.y= GAME_HEIGHT/2 + self._text.height/2
-            self._pausetxt=None
-        if not self._wave.getWinner():
-            self._state= STATE_COMPLETE
-            self._text= GLabel(text="YOU LOST",font_name="ComicSans.ttf",font_size=64)
-            self._text.x= GAME_WIDTH/2 - self._text.width/2
-            self._text.y= GAME_HEIGHT/2 + self._text.height/2
-            self._pausetxt=None
+            self._message("CONGRATS YOU WON")
+        else:
+            self._message("YOU LOST")
+        self._wave.hide(self.view)
+        self.view.remove(self._hud)
+        self._pausetxt=None
 
     def paused(self):
         if self.input.is_key_pressed('p') and self._state== STATE_ACTIVE:
             self._state= STATE_PAUSED
 
         if self._state== STATE_PAUSED:
-                self._text=GLabel(text="Press 'S' to Continue",\
-                font_name="ComicSans.ttf",font_size=64)
-                self._text.x= GAME_WIDTH/2 - self._text.width/2
-                self._text.y= GAME_HEIGHT/2 + self._text.height/2
+                self._message("Press 'S' to Continue")
 
     def stateactive(self,dt):
         if self._state==STATE_ACTIVE:
@@ -0,0 +1,296 @@
+"""
+Benchmark script for Alien Invaders
+
+This module measures the cost of a Wave, one animation frame at a time, without a
+window.  It builds waves of any size (far beyond the 10x15 limit of the command line
+arguments in consts.py), keeps a given number of laser bolts on screen, and drives
+Wave.update with a scripted input pattern.  For every formation size it reports the
+average time per frame spent in
+
+    update      (the whole of Wave.update)
+    collision   (Wave.checkcollision, part of update)
+    march       (Wave.aliensmov, part of update)
+    draw        (Wave.draw, and bringing the view up to date at the end of the frame)
+
+Run it from the folder containing the invaders folder, for example
+
+    python invaders/benchmark.py --sizes 5x12,10x15,20x40,40x80 --bolts 64
+
+Use --help for the full list of options.  Drawing uses the mock OpenGL backend of
+game2d.headless, so nothing is rendered, but every drawing command is still built.
+"""
+import os
+import time
+import random
+import argparse
+
+os.environ.setdefault('KIVY_NO_ARGS','1')
+os.environ.setdefault('KIVY_LOG_MODE','PYTHON')
+
+from consts import *
+from game2d import *
+from wave import *
+
+
+# The input patterns: each is a function from the frame number to the keys held down
+PATTERNS = {
+    'idle':  lambda frame: (),
+    'fire':  lambda frame: ('up',) if frame % 8 < 4 else (),
+    'sweep': lambda frame: (('left',) if (frame//60) % 2 else ('right',)) +
+                           (('up',) if frame % 8 < 4 else ()),
+}
+
+# The parts of a frame that are timed
+PHASES = ('update','collision','march','draw')
+
+
+def setpaths():
+    """
+    Sets the resource paths to the application directory and loads the texture atlas.
+
+    GameApp normally does this when the game starts, but the benchmark never creates
+    a GameApp.
+    """
+    import kivy.resources
+    path = os.path.dirname(os.path.abspath(__file__))
+    GameApp.fonts  = os.path.join(path,'Fonts')
+    GameApp.sounds = os.path.join(path,'Sounds')
+    GameApp.images = os.path.join(path,'Images')
+    GameApp.cache  = os.path.join(path,'Cache')
+    for folder in (GameApp.fonts,GameApp.sounds,GameApp.images):
+        kivy.resources.resource_add_path(folder)
+    GameApp.load_atlas()
+
+
+def timed(func,totals,phase):
+    """
+    Returns a version of func that adds its running time to totals[phase]
+
+    Parameter func: the function to time
+    Precondition: func is callable
+
+    Parameter totals: the running times of each phase
+    Precondition: totals is a dictionary with the key phase
+
+    Parameter phase: the phase to charge the time to
+    Precondition: phase is a string in PHASES
+    """
+    def wrapper(*args):
+        start = time.perf_counter()
+        result = func(*args)
+        totals[phase] += time.perf_counter()-start
+        return result
+    return wrapper
+
+
+def refill(wave,bolts):
+    """
+    Adds random bolts to wave until it has the given number on screen
+
+    Half of the added bolts belong to the player, and start just above the defense
+    line.  The other half belong to the aliens, and start near the top of the window.
+    The number of bolts is also capped by BOLT_LIMIT.
+
+    Parameter wave: the wave to fill
+    Precondition: wave is a Wave object
+
+    Parameter bolts: the number of bolts to keep on screen
+    Precondition: bolts is an int >= 0
+    """
+    pool = wave.getBolts()
+    while pool.getCount() < bolts:
+        x = random.uniform(BOLT_WIDTH,GAME_WIDTH-BOLT_WIDTH)
+        if pool.getCount() % 2 == 0:
+            added = pool.add(x,random.uniform(DEFENSE_LINE,GAME_HEIGHT/2),BOLT_SPEED)
+        else:
+            added = pool.add(x,random.uniform(GAME_HEIGHT/2,GAME_HEIGHT),-BOLT_SPEED)
+        if not added:
+            return
+
+
+def measure(rows,cols,frames=600,bolts=0,speed=ALIEN_SPEED,pattern='sweep',fps=60):
+    """
+    Returns a dictionary of the average time (in seconds) per frame of each phase
+
+    The wave is run for the given number of frames of 1/fps seconds each.  The ship
+    is restored as soon as it is destroyed, and the wave keeps running even if the
+    aliens win or lose, so every frame does comparable work.
+
+    Parameter rows: the number of rows of aliens
+    Precondition: rows is an int > 0
+
+    Parameter cols: the number of aliens in each row
+    Precondition: cols is an int > 0
+
+    Parameter frames: the number of frames to run
+    Precondition: frames is an int > 0
+
+    Parameter bolts: the number of bolts to keep on screen
+    Precondition: bolts is an int >= 0
+
+    Parameter speed: the number of seconds between alien steps
+    Precondition: speed is a number (int or float) >= 0
+
+    Parameter pattern: the input pattern
+    Precondition: pattern is a key of PATTERNS
+
+    Parameter fps: the frame rate to simulate
+    Precondition: fps is a number > 0
+    """
+    totals = dict.fromkeys(PHASES,0.0)
+    wave = Wave(rows,cols,speed)
+    wave.checkcollision = timed(wave.checkcollision,totals,'collision')
+    wave.aliensmov = timed(wave.aliensmov,totals,'march')
+
+    view  = GHeadlessView()
+    input = GHeadlessInput()
+    wave.show(view)
+    keys  = PATTERNS[pattern]
+    for frame in range(frames):
+        held = keys(frame)
+        for key in input.keys:
+            if not key in held:
+                input.release(key)
+        for key in held:
+            if not input.is_key_down(key):
+                input.press(key)
+        refill(wave,bolts)
+
+        start = time.perf_counter()
+        input._prestep()
+        wave.update(input,1.0/fps)
+        input._poststep()
+        middle = time.perf_counter()
+        view.clear()
+        wave.draw(view)
+        view._commit()
+        totals['update'] += middle-start
+        totals['draw'] += time.perf_counter()-middle
+
+        if wave.getShip() is None:
+            wave.setFlagcollides()
+            wave.createship()
+
+    for phase in PHASES:
+        totals[phase] /= frames
+    return totals
+
+
+def parse_sizes(text):
+    """
+    Returns the list of pairs (rows,cols) for formation sizes written as ROWSxCOLS
+
+    The sizes are separated by commas, as in 5x12,10x15.
+
+    Parameter text: the formation sizes
+    Precondition: text is a string
+    """
+    sizes = []
+    for size in text.split(','):
+        try:
+            rows, cols = (int(part) for part in size.lower().split('x'))
+        except ValueError:
+            raise argparse.ArgumentTypeError('%s is not of the form ROWSxCOLS' % repr(size))
+        if rows < 1 or cols < 1:
+            raise argparse.ArgumentTypeError('%s is not a valid formation size' % repr(size))
+        sizes.append((rows,cols))
+    return sizes
+
+
+def parse_count(text):
+    """
+    Returns the int >= 0 written in text
+
+    Parameter text: the count
+    Precondition: text is a string
+    """
+    try:
+        value = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError('%s is not an int' % repr(text))
+    if value < 0:
+        raise argparse.ArgumentTypeError('%s is negative' % repr(text))
+    return value
+
+
+def parse_frames(text):
+    """
+    Returns the int > 0 written in text
+
+    Parameter text: the number of frames
+    Precondition: text is a string
+    """
+    value = parse_count(text)
+    if value == 0:
+        raise argparse.ArgumentTypeError('%s is not positive' % repr(text))
+    return value
+
+
+def parse_time(text):
+    """
+    Returns the number >= 0 written in text
+
+    Parameter text: the number of seconds
+    Precondition: text is a string
+    """
+    try:
+        value = float(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError('%s is not a number' % repr(text))
+    if not value >= 0:
+        raise argparse.ArgumentTypeError('%s is not a number >= 0' % repr(text))
+    return value
+
+
+def parse_rate(text):
+    """
+    Returns the number > 0 written in text
+
+    Parameter text: the frame rate
+    Precondition: text is a string
+    """
+    value = parse_time(text)
+    if value == 0 or value == float('inf'):
+        raise argparse.ArgumentTypeError('%s is not a valid frame rate' % repr(text))
+    return value
+
+
+def main(args=None):
+    """
+    Runs the benchmark with the given command line arguments, printing a table
+
+    Parameter args: the command line arguments (sys.argv[1:] if None)
+    Precondition: args is a list of strings or None
+    """
+    parser = argparse.ArgumentParser(description='Measures the time per frame of a Wave.')
+    parser.add_argument('--sizes', type=parse_sizes, default='5x12,10x15,20x30,40x60',
+                        help='comma-separated formation sizes ROWSxCOLS')
+    parser.add_argument('--frames', type=parse_frames, default=600,
+                        help='the number of frames to run for each size')
+    parser.add_argument('--bolts', type=parse_count, default=0,
+                        help='the number of bolts to keep on screen (at most %d)' % BOLT_LIMIT)
+    parser.add_argument('--speed', type=parse_time, default=ALIEN_SPEED,
+                        help='the number of seconds between alien steps')
+    parser.add_argument('--pattern', choices=sorted(PATTERNS), default='sweep',
+                        help='the input pattern')
+    parser.add_argument('--fps', type=parse_rate, default=60,
+                        help='the frame rate to simulate')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='the random seed')
+    options = parser.parse_args(args)
+
+    init_headless()
+    setpaths()
+
+    print('%9s %7s' % ('size','aliens')+''.join(' %10s' % phase for phase in PHASES)+
+          '   (ms per frame)')
+    for (rows,cols) in options.sizes:
+        random.seed(options.seed)
+        result = measure(rows,cols,options.frames,options.bolts,options.speed,
+                         options.pattern,options.fps)
+        print('%9s %7d' % ('%dx%d' % (rows,cols),rows*cols)+
+              ''.join(' %10.3f' % (result[phase]*1000) for phase in PHASES))
+
+
+if __name__ == '__main__':
+    main()
@@ -75,6 +75,28 @@ BOLT_HEIGHT = 16
 BOLT_SPEED  = 10
 # the number of ALIEN STEPS (not frames) between bolts
 BOLT_RATE   = 5
+# the maximum number of bolts on screen at once
+BOLT_LIMIT  = 256
+
+
+### SIMULATION CONSTANTS ###
+
+# the number of simulation ticks per second (independent of the frame rate)
+TICK_RATE   = 120
+# the number of seconds in one simulation tick
+TICK_TIME   = 1.0/TICK_RATE
+# the updates per second that SHIP_MOVEMENT and BOLT_SPEED are measured in
+BASE_RATE   = 60
+# the fraction of a SHIP_MOVEMENT or BOLT_SPEED step to move per tick
+TICK_SCALE  = BASE_RATE/TICK_RATE
+# the most ticks to simulate in one frame; any more time than this is dropped
+MAX_TICKS   = 8
+
+
+### DRAWING CONSTANTS ###
+
+# the drawing layer of the messages, on top of the game objects (in layer 0)
+TEXT_LAYER  = 1
 
 
 ### GAME CONSTANTS ###
@@ -14,4 +14,8 @@ from .gtile import GTile
 from .gpath import GPath, GTriangle, GPolygon
 from .gview import GInput, GView
 from .sound import Sound, SoundLibrary
-from .app import GameApp
\ No newline at end of file
+from .app import GameApp
+from .pacer import Pacer
+from .gbatch import GSpriteBatch
+from .glayer import GLayer
+from .headless import GHeadless, GHeadlessInput, GHeadlessView, init_headless
\ No newline at end of file
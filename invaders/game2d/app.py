@@ -16,7 +16,6 @@ import kivy.app
 # Lower-level kivy modules to support animation
 from kivy.config import Config
 from kivy.clock  import Clock
-from kivy.core.window import Window
 from kivy.logger import Logger
 
 import traceback
@@ -27,6 +26,8 @@ import sys
 # Pull off the band aid
 import numpy as np
 
+from .pacer import Pacer
+
 class GameApp(kivy.app.App):
     """
     A controller class for a simple game application.
@@ -48,6 +49,14 @@ class GameApp(kivy.app.App):
     """
     # Class attribute for tracking textures (to reduce memory footprint)
     TEXTURE_CACHE = {}
+    # Class attribute for the atlas regions of images, by file name
+    ATLAS_CACHE = {}
+    # Class attribute for the frame regions of filmstrips, by (file name, format)
+    FRAME_CACHE = {}
+    # Class attribute for rendered text, from the most to the least recently used
+    TEXT_CACHE = {}
+    # The most rendered texts to keep in TEXT_CACHE
+    TEXT_CACHE_SIZE = 256
     
     
     # MUTABLE ATTRIBUTES
@@ -68,9 +77,51 @@ class GameApp(kivy.app.App):
     def fps(self,value):
         assert type(value) in [int,float], 'value %s is not a number' % repr(value)
         assert value > 0, 'value %s is not positive' % repr(value)
-        Clock.unschedule(self._refresh)
         self._fps = value
-        Clock.schedule_interval(self._refresh,1.0/self._fps)
+        if not self._idle:
+            self._schedule()
+    
+    @property
+    def idle_fps(self):
+        """
+        The number of frames-per-second to animate while the game is idle
+        
+        By default this value is 10 FPS.  See the attribute ``idle`` for more information.
+        
+        **Invariant**: Must be an int or float > 0.
+        """
+        return self._idle_fps
+    
+    @idle_fps.setter
+    def idle_fps(self,value):
+        assert type(value) in [int,float], 'value %s is not a number' % repr(value)
+        assert value > 0, 'value %s is not positive' % repr(value)
+        self._idle_fps = value
+        if self._idle:
+            self._schedule()
+    
+    @property
+    def idle(self):
+        """
+        Whether the game is in a state where the screen rarely changes
+        
+        Set this attribute to True while the game is paused or waiting for the player.
+        The game then animates at ``idle_fps`` instead of ``fps``, to save power.  The
+        game still reads input every frame, so it can set this back to False as soon as
+        the player presses a key.
+        
+        **Invariant**: Must be a bool.
+        """
+        return self._idle
+    
+    @idle.setter
+    def idle(self,value):
+        assert type(value) == bool, 'value %s is not a bool' % repr(value)
+        if value != self._idle:
+            self._idle = value
+            # The time spent at the old rate is not the time of the next frame
+            self._pacer.reset()
+            self._schedule()
     
     
     # IMMUTABLE PROPERTIES
@@ -116,6 +167,31 @@ class GameApp(kivy.app.App):
         """
         return self._input
     
+    @property
+    def headless(self):
+        """
+        Whether this game runs without a window.
+        
+        A headless game never opens a window or starts the Kivy clock. It is driven
+        by a :class:`GHeadless` driver instead.  See that class for more information.
+        
+        **Invariant**: Must be a bool.
+        """
+        return self._headless
+    
+    @property
+    def missed(self):
+        """
+        The number of frames that started after their deadline.
+        
+        A frame misses its deadline if it starts well over ``1/fps`` seconds after the
+        previous one, usually because that frame took too long. The game logs a warning
+        from time to time while this is happening.
+        
+        **Invariant**: Must be an int >= 0.
+        """
+        return self._pacer.missed
+    
     # CLASS METHODS
     @classmethod
     def is_image(cls,name):
@@ -192,20 +268,30 @@ class GameApp(kivy.app.App):
         return os.path.exists(os.path.join(cls.json,name))
     
     @classmethod
-    def load_texture(cls,name):
+    def load_texture(cls,name,atlas=True):
         """
         Returns: The texture for the given file name, or None if it cannot be loaded
         
-        The ``name`` must refer to the file in the **Images** folder.  If the texture
-        has already been loaded, it will return the cached texture.  Otherwise, it will
-        load the texture and cache it before returning it.
+        The ``name`` must refer to the file in the **Images** folder.  If the image was
+        packed into the texture atlas (see :meth:`load_atlas`), this returns its region
+        of the atlas, unless ``atlas`` is False.  If the texture has already been loaded,
+        it will return the cached texture.  Otherwise, it will load the texture and cache
+        it before returning it.
+        
+        Set ``atlas`` to False for textures that must be a texture of their own, such as
+        textures that repeat.
         
         This method will crash if name is not a valid file.
         
         :param name: The file name
         :type name:  ``str``
+        
+        :param atlas: Whether to return the atlas region of the image
+        :type atlas:  ``bool``
         """
         assert cls.is_image(name), '%s is not an image file' % repr(name)
+        if atlas and name in cls.ATLAS_CACHE:
+            return cls.ATLAS_CACHE[name]
         if name in cls.TEXTURE_CACHE:
             return cls.TEXTURE_CACHE[name]
         
@@ -220,6 +306,143 @@ class GameApp(kivy.app.App):
         
         return texture
     
+    @classmethod
+    def load_frames(cls,name,format):
+        """
+        Returns: The frames of the given filmstrip, or None if it cannot be loaded
+        
+        The image is divided into a grid of ``format`` (rows, columns) frames of equal
+        size, arranged left-to-right, top-to-bottom.  The frames are returned as a tuple
+        of texture regions in that order.  The regions are cached, so every sprite with
+        the same image and format shares them.
+        
+        :param name: The file name
+        :type name:  ``str``
+        
+        :param format: The grid size of the filmstrip as (rows, columns)
+        :type format:  2-element tuple of ints > 0
+        """
+        key = (name,tuple(format))
+        if key in cls.FRAME_CACHE:
+            return cls.FRAME_CACHE[key]
+        
+        texture = cls.load_texture(name)
+        if texture is None:
+            return None
+        
+        rows, cols = format
+        width  = texture.width/cols
+        height = texture.height/rows
+        frames = []
+        for row in range(rows):
+            for col in range(cols):
+                frames.append(texture.get_region(int(col*width),
+                                                 texture.height-int(row*height)-int(height),
+                                                 int(width),int(height)))
+        frames = tuple(frames)
+        cls.FRAME_CACHE[key] = frames
+        return frames
+    
+    @classmethod
+    def load_text(cls,text,font_name,font_size,bold,color,halign='center'):
+        """
+        Returns: The texture for the given text, rendered with the given font options
+        
+        Rendering text is slow, so the texture is cached.  Any later call with the same
+        text and options returns the same texture without rendering it again.  Only the
+        :attr:`TEXT_CACHE_SIZE` most recently used textures are kept.
+        
+        :param text: The text to render
+        :type text:  ``str``
+        
+        :param font_name: The font file (or the name of a Kivy font)
+        :type font_name:  ``str``
+        
+        :param font_size: The size of the font in points
+        :type font_size:  ``int`` or ``float`` > 0
+        
+        :param bold: Whether to render the text in bold
+        :type bold:  ``bool``
+        
+        :param color: The text color
+        :type color:  4-element sequence of floats between 0 and 1
+        
+        :param halign: The alignment of the lines of multiline text
+        :type halign:  one of 'left', 'right', or 'center'
+        """
+        key = (text,font_name,font_size,bold,tuple(color),halign)
+        if key in cls.TEXT_CACHE:
+            texture = cls.TEXT_CACHE.pop(key)
+            cls.TEXT_CACHE[key] = texture
+            return texture
+        
+        from kivy.core.text import Label as CoreLabel
+        label = CoreLabel(text=text,font_name=font_name,font_size=font_size,bold=bold,
+                          color=list(color),halign=halign,mipmap=True)
+        label.refresh()
+        texture = label.texture
+        
+        if len(cls.TEXT_CACHE) >= cls.TEXT_CACHE_SIZE:
+            del cls.TEXT_CACHE[next(iter(cls.TEXT_CACHE))]
+        cls.TEXT_CACHE[key] = texture
+        return texture
+    
+    @classmethod
+    def load_atlas(cls,size=1024):
+        """
+        Returns: The number of images packed into the texture atlas
+        
+        This method packs every image of the **Images** folder that fits into one or a
+        few textures of ``size`` x ``size`` pixels.  Afterwards, :meth:`load_texture`
+        returns the atlas region of a packed image instead of a texture of its own, so
+        drawing different images does not switch textures.
+        
+        Packing is slow, so the atlas is saved in the **Cache** folder.  The file name
+        is a hash of the contents of the images, so an atlas is only packed again when
+        an image changes.  Packing needs the PIL (Pillow) package; without it, or if
+        anything else goes wrong, no images are packed and this method returns 0.
+        
+        :param size: The width and height of each atlas texture
+        :type size:  ``int`` > 0
+        """
+        assert type(size) == int and size > 0, '%s is not a valid atlas size' % repr(size)
+        import hashlib
+        from kivy.atlas import Atlas
+        
+        # The atlas names images by file name without extension; pack each name once
+        names = {}
+        for name in sorted(os.listdir(cls.images)):
+            stem, ext = os.path.splitext(name)
+            if ext.lower() in ['.png','.jpg','.jpeg','.gif','.bmp'] and not stem in names:
+                names[stem] = name
+        
+        digest = hashlib.sha1(str(size).encode())
+        for stem in sorted(names):
+            digest.update(names[stem].encode())
+            with open(os.path.join(cls.images,names[stem]),'rb') as f:
+                digest.update(f.read())
+        base = os.path.join(cls.cache,'atlas-'+digest.hexdigest()[:16])
+        
+        try:
+            if not os.path.exists(base+'.atlas'):
+                from PIL import Image
+                files = []
+                for stem in sorted(names):
+                    path = os.path.join(cls.images,names[stem])
+                    with Image.open(path) as image:
+                        if image.size[0] <= size-4 and image.size[1] <= size-4:
+                            files.append(path)
+                os.makedirs(cls.cache,exist_ok=True)
+                Atlas.create(base,files,size)
+            atlas = Atlas(base+'.atlas')
+        except Exception as e:
+            Logger.info('GameApp: Could not pack the texture atlas (%s).' % e)
+            return 0
+        
+        for stem in atlas.textures:
+            cls.ATLAS_CACHE[names[stem]] = atlas.textures[stem]
+        return len(atlas.textures)
+    
     @classmethod
     def unload_texture(cls,name):
         """
@@ -227,12 +450,18 @@ class GameApp(kivy.app.App):
         
         The ``name`` should refer to the file in in the texture cache.  If the texture
         is in the cache, it will return the cached texture before removing it.  Otherwise, 
-        it will returning None.
+        it will returning None.  The filmstrip frames and tile meshes made from the
+        texture are removed as well.
         
         :param name: The file name
         :type name:  ``str``
         """
+        from .gtile import GTile
         assert type(name) == str, '%s is not a valid texture name' % repr(name)
+        for key in [key for key in cls.FRAME_CACHE if key[0] == name]:
+            del cls.FRAME_CACHE[key]
+        for key in [key for key in GTile.MESH_CACHE if key[0] == name]:
+            del GTile.MESH_CACHE[key]
         if name in cls.TEXTURE_CACHE:
             texture = cls.TEXTURE_CACHE[name]
             del cls.TEXTURE_CACHE[name]
@@ -286,6 +515,15 @@ class GameApp(kivy.app.App):
         The game window will not show until you start the game. To start the game, use 
         the method ``run()``.
         
+        If the keyword ``headless`` is True, the game never touches the Kivy window.
+        Such a game should be created and run by :class:`GHeadless`.
+        
+        The keywords ``fps`` and ``idle_fps`` set the frame rates of the game while it is
+        active and idle, respectively (see the attribute ``idle``).
+        
+        Unless the keyword ``atlas`` is False, the images are packed into a texture
+        atlas when the game is created (see :meth:`load_atlas`).
+        
         **You will never call the constructor or run yourself**.  That is handled for 
         you in the provided code.
         
@@ -295,40 +533,34 @@ class GameApp(kivy.app.App):
         w = keywords.pop('width', 0.0)
         h = keywords.pop('height', 0.0)
         f = keywords.pop('fps', 60.0)
+        i = keywords.pop('idle_fps', 10.0)
+        self._headless = keywords.pop('headless', False)
+        atlas = keywords.pop('atlas', True)
 
         assert type(w) in [int,float], 'width %s is not a number' % repr(w)
         assert type(h) in [int,float], 'height %s is not a number' % repr(h)
         assert type(f) in [int,float], 'fps %s is not a number' % repr(value)
         assert f > 0, 'fps %s is not positive' % repr(value)
+        assert type(i) in [int,float], 'idle fps %s is not a number' % repr(i)
+        assert i > 0, 'idle fps %s is not positive' % repr(i)
         
         self._gwidth = w
         self._gheight = h
-        Window.size = (self.width,self.height)
-        Window.bind(on_request_close=self._exit)
-        
         self._fps = f
-        
-        x = keywords.pop('left', None)
-        y = keywords.pop('top', None)
-        assert x is None or type(x) in [int,float], 'left edge %s is not a number' % repr(x)
-        assert y is None or type(y) in [int,float], 'top edge %s is not a number' % repr(y)
-        
-        if not x is None:
-            Window.left = x
-        if not y is None:
-            Window.top = y
-        
-        x = keywords.pop('right', None)
-        y = keywords.pop('bottom', None)
-        assert x is None or type(x) in [int,float], 'right edge %s is not a number' % repr(x)
-        assert y is None or type(y) in [int,float], 'bottom edge %s is not a number' % repr(y)
-        
-        if not x is None:
-            Window.left = x-self.width
-        if not y is None:
-            Window.top = y+self.height
+        self._idle_fps = i
+        self._idle = False
+        self._pacer = Pacer()
+        self._event = None
+        
+        if self._headless:
+            for key in ['left','top','right','bottom']:
+                keywords.pop(key, None)
+        else:
+            self._setwindow(keywords)
         
         self._setpaths()
+        if atlas:
+            self.load_atlas()
         
         # Tell Kivy to build the application
         kivy.app.App.__init__(self,**keywords)
@@ -347,6 +579,7 @@ class GameApp(kivy.app.App):
         self._view.size_hint = (1,1)
         self._input = GInput()
         self._input._register(self._view)
+        self._setviewport()
         return self.view
     
     def run(self):
@@ -356,6 +589,7 @@ class GameApp(kivy.app.App):
         This is a Kivy reserved method.  It is part of the Kivy application process.  
         It should **never** be overridden.
         """
+        assert not self._headless, 'headless games must be run with GHeadless'
         try:
             Clock.schedule_once(self._bootstrap,-1)
             kivy.app.App.run(self)
@@ -429,12 +663,38 @@ class GameApp(kivy.app.App):
         This method is a callback-proxy for method `start`.  It handles important issues 
         behind the scenes, particularly with setting the FPS
         """
-        if (self.fps < 60):
-            Clock.schedule_interval(self._refresh,1.0/self.fps)
-        else:
-            Clock.schedule_interval(self._refresh,0)
+        self._event = Clock.schedule_interval(self._pace,1.0/self._rate())
         self.start()
     
+    def _schedule(self):
+        """
+        Schedules the clock callback again at the current frame rate.
+        
+        This does nothing until the game is running.
+        """
+        if self._event is None:
+            return
+        self._event.cancel()
+        self._event = Clock.schedule_interval(self._pace,1.0/self._rate())
+    
+    def _rate(self):
+        """
+        Returns the current frame rate: ``idle_fps`` if the game is idle, ``fps`` otherwise.
+        """
+        return self._idle_fps if self._idle else self._fps
+    
+    def _pace(self,dt):
+        """
+        Times the next frame and then processes it.
+        
+        This method is the clock callback of a windowed game.  The pacer measures the
+        time since the last frame, and counts the frames that start late.
+        
+        :param dt: time in seconds since last clock tick (ignored)
+        :type dt:  ``int`` or ``float``
+        """
+        self._refresh(self._pacer.tick(self._rate()))
+    
     def _refresh(self,dt):
         """
         Processes a single animation frame.
@@ -450,6 +710,47 @@ class GameApp(kivy.app.App):
         self.update(dt)
         self.input._poststep()
         self.draw()
+        self.view._commit()
+    
+    def _setwindow(self,keywords):
+        """
+        Sizes and positions the game window.
+        
+        The window is only imported here, as importing it creates it.
+        
+        :param keywords: dictionary of keyword arguments 
+        :type keywords:  keys are attribute names
+        """
+        from kivy.core.window import Window
+        Window.size = (self.width,self.height)
+        Window.bind(on_request_close=self._exit)
+        
+        x = keywords.pop('left', None)
+        y = keywords.pop('top', None)
+        assert x is None or type(x) in [int,float], 'left edge %s is not a number' % repr(x)
+        assert y is None or type(y) in [int,float], 'top edge %s is not a number' % repr(y)
+        
+        if not x is None:
+            Window.left = x
+        if not y is None:
+            Window.top = y
+        
+        x = keywords.pop('right', None)
+        y = keywords.pop('bottom', None)
+        assert x is None or type(x) in [int,float], 'right edge %s is not a number' % repr(x)
+        assert y is None or type(y) in [int,float], 'bottom edge %s is not a number' % repr(y)
+        
+        if not x is None:
+            Window.left = x-self.width
+        if not y is None:
+            Window.top = y+self.height
+    
+    def _setviewport(self):
+        """
+        Sets the viewport of the view to the window, so objects off screen are culled.
+        """
+        if self.width > 0 and self.height > 0:
+            self._view.viewport = (0,0,self.width,self.height)
     
     def _setpaths(self):
         """
@@ -467,6 +768,7 @@ class GameApp(kivy.app.App):
         GameApp.fonts  = str(os.path.join(path, 'Fonts'))
         GameApp.sounds = str(os.path.join(path, 'Sounds'))
         GameApp.images = str(os.path.join(path, 'Images'))
+        GameApp.cache  = str(os.path.join(path, 'Cache'))
         
         import kivy.resources
         kivy.resources.resource_add_path(GameApp.fonts)
@@ -0,0 +1,398 @@
+"""
+A module to support batched drawing of many sprites.
+
+Every :class:`GImage` has its own drawing cache, with a color, a rectangle and the
+matrix transforms around them.  That is fine for a few images, but a screen with
+hundreds of identical sprites spends most of its time on these instructions.  A sprite
+batch instead stores many textured rectangles (quads) in NumPy arrays, and draws all
+of them with a single Kivy ``Mesh`` per tint.
+"""
+from kivy.graphics import *
+from kivy.graphics.instructions import *
+from .gobject import GObject
+from .app import GameApp
+import numpy as np
+
+
+# #mark -
+class GSpriteBatch(GObject):
+    """
+    A class representing many sprites sharing a single texture.
+
+    The texture is given by an image file whose name is stored in the attribute
+    ``source``, just like :class:`GImage`.  If there is no source, the sprites are solid
+    rectangles of their tint color.
+
+    Each sprite (or quad) has its own center, size, texture region and tint, and can be
+    hidden without being removed.  Quads are referred to by index, in the order they
+    were added.  The methods that change quads accept either a single index, or a slice
+    or NumPy array of indices (with matching arrays of values) to change many quads at
+    once.
+
+    The quads are only turned into drawing commands when the batch is drawn, and only
+    if something changed.  All of the quads with the same tint are drawn by one Kivy
+    ``Mesh``.  The attributes ``x``, ``y``, ``angle`` and ``scale`` apply to the batch
+    as a whole, so quad positions are relative to the batch position.
+    """
+
+    __slots__ = ('_source','_texture','_count','_center','_extent','_region','_tint',
+                 '_shown','_dirty','_meshes')
+    # The most quads in a single mesh (mesh indices are 16 bit)
+    MESH_QUADS = 65536//4
+
+    # MUTABLE PROPERTIES
+    @property
+    def source(self):
+        """
+        The source file for the texture, or ``None`` for solid quads.
+
+        **invariant**. Value is ``None`` or a string refering to a valid file.
+        """
+        return self._source
+
+    @source.setter
+    def source(self,value):
+        assert value is None or GameApp.is_image(value), '%s is not an image file' % repr(value)
+        self._source = value
+        self._texture = None if value is None else GameApp.load_texture(value)
+        self._dirty = True
+        self._touch()
+        self._meshes = []
+        self._stale = True
+
+
+    # IMMUTABLE PROPERTIES
+    @property
+    def count(self):
+        """
+        The number of quads in this batch (visible or not).
+
+        **invariant**. Value is an int >= 0.
+        """
+        return self._count
+
+    @property
+    def meshes(self):
+        """
+        The number of meshes drawn the last time the batch was drawn.
+
+        **invariant**. Value is an int >= 0.
+        """
+        return len(self._meshes)
+
+
+    # BUILT-IN METHODS
+    def __init__(self,**keywords):
+        """
+        Creates a new, empty sprite batch.
+
+        To use the constructor for this class, you should provide it with a list of
+        keyword arguments that initialize various attributes. For example, to make a
+        batch of sprites using the image ``alien1.png``, use the constructor::
+
+            GSpriteBatch(source='alien1.png')
+
+        This class supports the same keywords as :class:`GObject`, together with
+        ``source`` and ``capacity`` (the initial number of quads to make room for).
+
+        :param keywords: dictionary of keyword arguments
+        :type keywords:  keys are attribute names
+        """
+        self._defined = False
+        capacity = keywords['capacity'] if 'capacity' in keywords else 16
+        assert type(capacity) == int and capacity > 0, '%s is not a valid capacity' % repr(capacity)
+        self._count  = 0
+        self._center = np.zeros((capacity,2),dtype=np.float32)
+        self._extent = np.zeros((capacity,2),dtype=np.float32)
+        self._region = np.zeros((capacity,4),dtype=np.float32)
+        self._tint   = np.ones((capacity,4),dtype=np.float32)
+        self._shown  = np.zeros(capacity,dtype=bool)
+        self.source = keywords['source'] if 'source' in keywords else None
+        GObject.__init__(self,**keywords)
+        self._defined = True
+
+
+    # PUBLIC METHODS
+    def add(self,x,y,width=None,height=None,region=None,tint=None):
+        """
+        Adds a quad centered at (x,y), returning its index.
+
+        The ``region`` is the part of the texture to show, as a tuple (left, bottom,
+        width, height) in texture pixels, just like ``Texture.get_region``.  By default
+        it is the entire texture.  The size of the quad defaults to the size of the
+        region.  The ``tint`` multiplies the texture colors; it defaults to white.
+
+        :param x: the horizontal coordinate of the quad center
+        :type x:  ``int`` or ``float``
+
+        :param y: the vertical coordinate of the quad center
+        :type y:  ``int`` or ``float``
+
+        :param width: the quad width (or None for the region width)
+        :type width:  ``int`` or ``float`` > 0, or None
+
+        :param height: the quad height (or None for the region height)
+        :type height:  ``int`` or ``float`` > 0, or None
+
+        :param region: the texture region to show (or None for the whole texture)
+        :type region:  4-element tuple of numbers, or None
+
+        :param tint: the quad tint (or None for white)
+        :type tint:  a color, or None
+
+        :return: the index of the new quad
+        :rtype:  ``int``
+        """
+        index = self._count
+        self.extend([x],[y],width,height,region,tint)
+        return index
+
+    def extend(self,xs,ys,width=None,height=None,region=None,tint=None):
+        """
+        Adds a quad centered at each (xs[k],ys[k]), returning the new indices.
+
+        Every new quad shares the same size, region and tint.  See :meth:`add` for
+        the meaning and defaults of these values.
+
+        :param xs: the horizontal coordinates of the quad centers
+        :type xs:  sequence or NumPy array of numbers
+
+        :param ys: the vertical coordinates of the quad centers
+        :type ys:  sequence or NumPy array of numbers, the same length as xs
+
+        :param width: the quad width (or None for the region width)
+        :type width:  ``int`` or ``float`` > 0, or None
+
+        :param height: the quad height (or None for the region height)
+        :type height:  ``int`` or ``float`` > 0, or None
+
+        :param region: the texture region to show (or None for the whole texture)
+        :type region:  4-element tuple of numbers, or None
+
+        :param tint: the quad tint (or None for white)
+        :type tint:  a color, or None
+
+        :return: the indices of the new quads
+        :rtype:  ``range``
+        """
+        assert len(xs) == len(ys), 'the coordinate sequences have different lengths'
+        size = len(xs)
+        start = self._count
+        while start+size > len(self._shown):
+            self._grow()
+        self._count += size
+
+        indices = slice(start,start+size)
+        self._center[indices,0] = xs
+        self._center[indices,1] = ys
+        self._shown[indices] = True
+        self.set_region(indices,region)
+        self.set_tint(indices,tint)
+        if width is not None or height is not None:
+            self.set_size(indices,width,height)
+        return range(start,start+size)
+
+    def clear(self):
+        """
+        Removes every quad from this batch.
+        """
+        self._count = 0
+        self._dirty = True
+        self._touch()
+
+    def move(self,index,x,y):
+        """
+        Moves the given quads so that they are centered at (x,y).
+
+        :param index: the quad (or quads) to move
+        :type index:  ``int``, ``slice`` or NumPy array of ints
+
+        :param x: the new horizontal coordinate(s) of the quad centers
+        :type x:  ``int``, ``float`` or NumPy array of numbers
+
+        :param y: the new vertical coordinate(s) of the quad centers
+        :type y:  ``int``, ``float`` or NumPy array of numbers
+        """
+        self._center[:self._count][index,0] = x
+        self._center[:self._count][index,1] = y
+        self._dirty = True
+        self._touch()
+
+    def set_size(self,index,width,height):
+        """
+        Resizes the given quads.
+
+        A size of None keeps the current size along that axis.
+
+        :param index: the quad (or quads) to resize
+        :type index:  ``int``, ``slice`` or NumPy array of ints
+
+        :param width: the new width(s) of the quads
+        :type width:  ``int``, ``float``, NumPy array of numbers, or None
+
+        :param height: the new height(s) of the quads
+        :type height:  ``int``, ``float``, NumPy array of numbers, or None
+        """
+        if width is not None:
+            self._extent[:self._count][index,0] = width
+        if height is not None:
+            self._extent[:self._count][index,1] = height
+        self._dirty = True
+        self._touch()
+
+    def set_region(self,index,region):
+        """
+        Sets the texture region shown by the given quads.
+
+        The region is a tuple (left, bottom, width, height) in texture pixels.  The
+        quads are also resized to the size of the region; call :meth:`set_size`
+        afterwards to draw them at another size.
+
+        :param index: the quad (or quads) to change
+        :type index:  ``int``, ``slice`` or NumPy array of ints
+
+        :param region: the texture region to show (or None for the whole texture)
+        :type region:  4-element tuple of numbers, or None
+        """
+        texture = self._texture
+        if region is None:
+            region = (0,0,1,1) if texture is None else (0,0,texture.width,texture.height)
+        assert len(region) == 4, '%s is not a valid region' % repr(region)
+        if texture is None:
+            self._region[:self._count][index] = (0,0,1,1)
+        else:
+            self._region[:self._count][index] = (region[0]/texture.width,region[1]/texture.height,
+                                  (region[0]+region[2])/texture.width,
+                                  (region[1]+region[3])/texture.height)
+        self._extent[:self._count][index] = (region[2],region[3])
+        self._dirty = True
+        self._touch()
+
+    def set_tint(self,index,tint):
+        """
+        Sets the tint of the given quads.
+
+        :param index: the quad (or quads) to change
+        :type index:  ``int``, ``slice`` or NumPy array of ints
+
+        :param tint: the quad tint (or None for white)
+        :type tint:  a color, or None
+        """
+        self._tint[:self._count][index] = (1,1,1,1) if tint is None else GObject.to_rgba(tint)
+        self._dirty = True
+        self._touch()
+
+    def set_visible(self,index,visible):
+        """
+        Shows or hides the given quads.
+
+        Hidden quads keep their index and attributes, but are not drawn.
+
+        :param index: the quad (or quads) to change
+        :type index:  ``int``, ``slice`` or NumPy array of ints
+
+        :param visible: whether to show the quads
+        :type visible:  ``bool`` or NumPy array of bools
+        """
+        self._shown[:self._count][index] = visible
+        self._dirty = True
+        self._touch()
+
+    # HIDDEN METHODS
+    def _prepare(self):
+        """
+        Brings the meshes and the drawing cache up to date before the batch is drawn.
+
+        The meshes are rebuilt first if any quad changed since the last draw.
+        """
+        if self._dirty:
+            self._build()
+        GObject._prepare(self)
+
+    def _grow(self):
+        """
+        Doubles the capacity of the quad arrays.
+        """
+        capacity = 2*len(self._shown)
+        self._center = np.resize(self._center,(capacity,2))
+        self._extent = np.resize(self._extent,(capacity,2))
+        self._region = np.resize(self._region,(capacity,4))
+        self._tint   = np.resize(self._tint,(capacity,4))
+        self._shown  = np.resize(self._shown,capacity)
+
+    def _build(self):
+        """
+        Rebuilds the meshes from the quad arrays.
+
+        The visible quads are grouped by tint, and every group is turned into a vertex
+        array (x, y, u, v for each corner) in one vectorized pass.  The mesh
+        instructions are reused if the number of meshes did not change.
+        """
+        shown = np.flatnonzero(self._shown[:self._count])
+        tints, group = np.unique(self._tint[shown],axis=0,return_inverse=True)
+        group = group.reshape(-1)
+
+        # Map the region fractions through the texture coordinates (handles flips)
+        if self._texture is None:
+            coords = (0.0,0.0,1.0,0.0,1.0,1.0,0.0,1.0)
+        else:
+            coords = self._texture.tex_coords
+        u0, du = coords[0], coords[2]-coords[0]
+        v0, dv = coords[1], coords[7]-coords[1]
+
+        batches = []
+        for k in range(len(tints)):
+            quads = shown[group == k]
+            for start in range(0,len(quads),self.MESH_QUADS):
+                chunk = quads[start:start+self.MESH_QUADS]
+                lo = self._center[chunk]-self._extent[chunk]/2
+                hi = self._center[chunk]+self._extent[chunk]/2
+                uv = self._region[chunk]
+
+                vert = np.empty((len(chunk),4,4),dtype=np.float32)
+                vert[:,0,0] = vert[:,3,0] = lo[:,0]
+                vert[:,1,0] = vert[:,2,0] = hi[:,0]
+                vert[:,0,1] = vert[:,1,1] = lo[:,1]
+                vert[:,2,1] = vert[:,3,1] = hi[:,1]
+                vert[:,0,2] = vert[:,3,2] = u0+uv[:,0]*du
+                vert[:,1,2] = vert[:,2,2] = u0+uv[:,2]*du
+                vert[:,0,3] = vert[:,1,3] = v0+uv[:,1]*dv
+                vert[:,2,3] = vert[:,3,3] = v0+uv[:,3]*dv
+
+                base = np.arange(0,4*len(chunk),4,dtype=np.uint16)[:,None]
+                indx = base+np.array([0,1,2,2,3,0],dtype=np.uint16)
+                batches.append((tuple(tints[k].tolist()),vert.reshape(-1),indx.reshape(-1)))
+
+        if len(batches) != len(self._meshes):
+            self._meshes = [(Color(1,1,1),Mesh(mode='triangles',texture=self._texture))
+                            for batch in batches]
+            self._stale = True
+        for (color,mesh), (rgba,vert,indx) in zip(self._meshes,batches):
+            color.rgba = rgba
+            mesh.vertices = vert
+            mesh.indices = indx
+        self._dirty = False
+        self._invalidate()
+
+    def _local_bounds(self):
+        """
+        Returns the box enclosing the visible quads, or None if there are none.
+
+        The box is only brought up to date when the meshes are rebuilt.
+        """
+        shown = np.flatnonzero(self._shown[:self._count])
+        if len(shown) == 0:
+            return None
+        lo = (self._center[shown]-self._extent[shown]/2).min(axis=0)
+        hi = (self._center[shown]+self._extent[shown]/2).max(axis=0)
+        return (float(lo[0]),float(lo[1]),float(hi[0]),float(hi[1]))
+
+    def _reset(self):
+        """
+        Resets the drawing cache.
+        """
+        GObject._reset(self)
+        for (color,mesh) in self._meshes:
+            self._cache.add(color)
+            self._cache.add(mesh)
+        self._cache.add(PopMatrix())
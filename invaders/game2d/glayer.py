@@ -0,0 +1,143 @@
+"""
+A module to support offscreen rendering of static layers.
+
+Many objects on screen, like backgrounds, borders and most text, do not change from
+one frame to the next.  A layer renders such objects once into an offscreen texture
+(a Kivy ``Fbo``), and afterwards draws them all as a single textured rectangle.  The
+objects are only rendered again when the layer is marked dirty.
+"""
+from kivy.graphics import *
+from kivy.graphics.instructions import *
+from .gobject import GObject, is_gobject_list
+import math
+
+
+# #mark -
+class GLayer(GObject):
+    """
+    A class representing a group of objects rendered offscreen.
+
+    The layer is a rectangle of the given ``width`` and ``height``.  The children are
+    drawn as if the bottom left corner of this rectangle is the origin.  So a layer
+    with ``left=0`` and ``bottom=0`` uses the same coordinates as the view.  Anything
+    outside of the rectangle is cut off.
+
+    The children are rendered the first time the layer is drawn.  Changes to them do
+    not show until the layer is marked dirty, either by setting the attribute ``dirty``
+    or by assigning the ``children``.  Only put objects that rarely change in a layer.
+    """
+    __slots__ = ('_children','_dirty','_fbo')
+
+    # MUTABLE PROPERTIES
+    @property
+    def children(self):
+        """
+        The list of objects stored in this layer.
+
+        Assigning this value marks the layer as dirty.
+
+        **invariant**: Value must be a list or tuple of :class:`GObject` (possibly empty)
+        """
+        return tuple(self._children)
+
+    @children.setter
+    def children(self,value):
+        assert is_gobject_list(value), '%s is not a list of valid objects' % repr(value)
+        self._children = list(value)
+        self._dirty = True
+        self._touch()
+
+    @property
+    def dirty(self):
+        """
+        Whether the children must be rendered again before the layer is next drawn.
+
+        Set this to True whenever a child changes.
+
+        **invariant**: Value must be a ``bool``
+        """
+        return self._dirty
+
+    @dirty.setter
+    def dirty(self,value):
+        assert type(value) == bool, '%s is not a bool' % repr(value)
+        self._dirty = value
+        if value:
+            self._touch()
+
+
+    # BUILT-IN METHODS
+    def __init__(self,**keywords):
+        """
+        Creates a new offscreen layer.
+
+        To use the constructor for this class, you should provide it with a list of
+        keyword arguments that initialize various attributes. For example, to make a
+        layer covering a 800x700 view, containing the shapes rect and text, use::
+
+            GLayer(left=0,bottom=0,width=800,height=700,children=[rect,text])
+
+        This class supports the same keywords as :class:`GObject`, together with
+        ``children``.  However, the attributes `width` and `height` are **required**
+        (so that the layer knows how large a texture to render into).  Leaving out these
+        values will cause a `ValueError`.
+
+        :param keywords: dictionary of keyword arguments
+        :type keywords:  keys are attribute names, including 'width' and 'height'
+        """
+        self._defined = False
+        if not 'width' in keywords:
+            raise ValueError("The 'width' argument must be specified.")
+        if not 'height' in keywords:
+            raise ValueError("The 'height' argument must be specified.")
+        self._fbo = None
+        self.children = keywords['children'] if 'children' in keywords else []
+        GObject.__init__(self,**keywords)
+        self._defined = True
+
+
+    # HIDDEN METHODS
+    def _prepare(self):
+        """
+        Brings the drawing cache up to date before the layer is drawn.
+
+        If the layer is dirty, the children are rendered offscreen as well.
+        """
+        GObject._prepare(self)
+        if self._dirty:
+            self._render()
+
+    def _draw_state(self):
+        """
+        Returns the OpenGL state set by this layer, as a pair (texture, color).
+        """
+        return (self._fbo.texture.id,(1.0,1.0,1.0,1.0))
+
+    def _render(self):
+        """
+        Renders the children into the offscreen texture.
+        """
+        self._fbo.clear()
+        self._fbo.add(ClearColor(0,0,0,0))
+        self._fbo.add(ClearBuffers())
+        for child in self._children:
+            child._prepare()
+            self._fbo.add(child._cache)
+        self._fbo.draw()
+        self._dirty = False
+
+    def _reset(self):
+        """
+        Resets the drawing cache.
+        """
+        size = (int(math.ceil(self.width)),int(math.ceil(self.height)))
+        if self._fbo is None or tuple(self._fbo.size) != size:
+            self._fbo = Fbo(size=size)
+            self._dirty = True
+
+        GObject._reset(self)
+        x = -self.width/2.0
+        y = -self.height/2.0
+        self._cache.add(self.color_instruction((1.0,1.0,1.0,1.0)))
+        self._cache.add(Rectangle(pos=(x,y),size=(self.width,self.height),texture=self._fbo.texture))
+        self._cache.add(PopMatrix())
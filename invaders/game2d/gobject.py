@@ -12,6 +12,8 @@ from kivy.graphics import *
 from kivy.graphics.instructions import *
 from introcs.geom import Point2, Matrix
 import introcs
+import numpy as np
+import math
 
 def is_color(c):
     """
@@ -89,7 +91,29 @@ class GObject(object):
     You should never make a `GObject` directly.  Instead, you should use one of the
     subclasses: :class:`GRectangle`, :class:`GEllipse`, :class:`GImage`, :class:`GLabel`,
     :class:`GTriangle`, :class:`GPolygon`, or :class:`GPath`.
+
+    The attributes of a graphics object are stored as plain numbers.  The Kivy drawing
+    instructions are only made the first time the object is drawn, and are only brought
+    up to date when it is drawn again after a change.  So objects that are made but
+    never drawn cost very little.  Objects have no instance dictionary (see
+    ``__slots__``), so a subclass that adds attributes should list them in its own
+    ``__slots__`` to keep objects small.
     """
+    __slots__ = ('_defined','_x','_y','_width','_height','_set_width','_set_height',
+                 '_angle','_sx','_sy','_fillcolor','_linecolor','_name','_layer',
+                 '_trans','_rotate','_scale','_cache','_stale','_moved',
+                 '_matrix','_invrse','_mtrue','_aabb','_parent','_view')
+
+    # Class attribute for the RGBA tuple of color values converted, by value, from the
+    # least to the most recently used
+    COLOR_CACHE = {}
+    # The most color values (and Color instructions) to keep in the color caches
+    COLOR_CACHE_SIZE = 1024
+    # Class attribute for the shared Kivy Color instruction of each RGBA tuple, from
+    # the least to the most recently used
+    COLOR_INSTRUCTIONS = {}
+    # The number of color conversions [found in, added to] COLOR_CACHE (see color_stats)
+    _COLOR_COUNTS = [0,0]
 
     # MUTABLE PROPERTIES
     @property
@@ -99,13 +123,15 @@ class GObject(object):
 
         **invariant**: Value must be an ``int`` or ``float``
         """
-        return self._trans.x
+        return self._x
 
     @x.setter
     def x(self,value):
         assert type(value) in [int,float], '%s is not a number' % repr(value)
-        self._trans.x = float(value)
+        self._x = float(value)
         self._mtrue = False
+        self._moved = True
+        self._invalidate()
 
     @property
     def y(self):
@@ -114,13 +140,15 @@ class GObject(object):
 
         **invariant**: Value must be an ``int`` or ``float``
         """
-        return self._trans.y
+        return self._y
 
     @y.setter
     def y(self,value):
         assert type(value) in [int,float], '%s is not a number' % repr(value)
-        self._trans.y = float(value)
+        self._y = float(value)
         self._mtrue = False
+        self._moved = True
+        self._invalidate()
 
     @property
     def width(self):
@@ -139,8 +167,8 @@ class GObject(object):
         assert value > 0, '%s is not positive' % repr(value)
         self._width = float(value)
         self._set_width = True
-        if self._defined:
-            self._reset()
+        self._stale = True
+        self._invalidate()
 
     @property
     def height(self):
@@ -159,8 +187,8 @@ class GObject(object):
         assert value > 0, '%s is not positive' % repr(value)
         self._height = float(value)
         self._set_height = True
-        if self._defined:
-            self._reset()
+        self._stale = True
+        self._invalidate()
 
     @property
     def scale(self):
@@ -177,7 +205,7 @@ class GObject(object):
 
         **invariant**: Value must be either a number (``int`` or ``float``) or a pair of numbers.
         """
-        return (self._scale.x,self._scale.y)
+        return (self._sx,self._sy)
 
     @scale.setter
     def scale(self,value):
@@ -185,12 +213,14 @@ class GObject(object):
         assert type(value) in [int,float] or is_num_tuple(value,2), \
                 '%s is not a valid scaling factor' % repr(value)
         if type(value) in [int,float]:
-            self._scale.x = float(value)
-            self._scale.y = float(value)
+            self._sx = float(value)
+            self._sy = float(value)
         else:
-            self._scale.x = float(value[0])
-            self._scale.y = float(value[1])
+            self._sx = float(value[0])
+            self._sy = float(value[1])
         self._mtrue = False
+        self._moved = True
+        self._invalidate()
 
     @property
     def angle(self):
@@ -201,16 +231,18 @@ class GObject(object):
 
         **invariant**: Value must be an ``int`` or ``float``
         """
-        return self._rotate.angle
+        return self._angle
 
     @angle.setter
     def angle(self,value):
         import numpy as np
         assert type(value) in [int,float], '%s is not a number' % repr(value)
-        diff = np.allclose([self._rotate.angle],[value])
-        self._rotate.angle = float(value)
+        diff = np.allclose([self._angle],[value])
+        self._angle = float(value)
         if not diff:
             self._mtrue = False
+            self._moved = True
+            self._invalidate()
 
     @property
     def linecolor(self):
@@ -229,25 +261,13 @@ class GObject(object):
 
         **invariant**: Value must be ``None`` or a 4-element list of floats between 0 and 1.
         """
-        return None if self._linecolor is None else self._linecolor.rgba
+        return None if self._linecolor is None else list(self._linecolor)
 
     @linecolor.setter
     def linecolor(self,value):
-        import introcs
-        assert value is None or is_color(value), '%s is not a valid color' % repr(value)
-        if type(value) in [tuple, list] and len(value) == 3:
-            value = list(value)+[1.0]
-        elif type(value) in [introcs.RGB, introcs.HSV]:
-            value = value.glColor()
-        elif type(value) == str:
-            if value[0] == '#':
-                value = introcs.RGB.CreateWebColor(value).glColor()
-            else:
-                value = introcs.RGB.CreateName(value).glColor()
-
-        self._linecolor = None if value is None else Color(value[0],value[1],value[2],value[3])
-        if self._defined:
-            self._reset()
+        self._linecolor = self.to_rgba(value)
+        self._stale = True
+        self._invalidate()
 
     @property
     def fillcolor(self):
@@ -267,25 +287,13 @@ class GObject(object):
 
         **invariant**: Value must be ``None`` or a 4-element list of floats between 0 and 1.
         """
-        return None if self._fillcolor is None else self._fillcolor.rgba
+        return None if self._fillcolor is None else list(self._fillcolor)
 
     @fillcolor.setter
     def fillcolor(self,value):
-        import introcs
-        assert value is None or is_color(value), '%s is not a valid color' % repr(value)
-        if type(value) in [tuple, list] and len(value) == 3:
-            value = list(value)+[1.0]
-        elif type(value) in [introcs.RGB, introcs.HSV]:
-            value = value.glColor()
-        elif type(value) == str:
-            if value[0] == '#':
-                value = introcs.RGB.CreateWebColor(value).glColor()
-            else:
-                value = introcs.RGB.CreateName(value).glColor()
-
-        self._fillcolor = None if value is None else Color(value[0],value[1],value[2],value[3])
-        if self._defined:
-            self._reset()
+        self._fillcolor = self.to_rgba(value)
+        self._stale = True
+        self._touch()
 
     @property
     def name(self):
@@ -305,6 +313,26 @@ class GObject(object):
         assert value is None or type(value) == str, '%s is not a valid name' % repr(value)
         self._name = value
 
+    @property
+    def layer(self):
+        """
+        The drawing layer of this object.
+
+        This value matters for objects added to a view (see :meth:`GView.add`), and for
+        objects drawn each frame if the view sorts its drawing commands (see the
+        attribute ``sorting`` of :class:`GView`).  Objects in a higher layer are then
+        always drawn on top of the objects in a lower layer.
+
+        **invariant**: Value must be an ``int``
+        """
+        return self._layer
+
+    @layer.setter
+    def layer(self,value):
+        assert type(value) == int, '%s is not an int' % repr(value)
+        self._layer = value
+        self._touch()
+
     # DERIVED PROPERTIES
     @property
     def left(self):
@@ -322,14 +350,14 @@ class GObject(object):
         **invariant**: Value must be an ``int`` or ``float``.
         """
         # Optimize for 90 degree turns
-        if (self._rotate.angle % 360) == 0.0:
-            return self.x-self._scale.x*self.width/2.0
-        elif (self._rotate.angle % 360) == 180:
-            return self.x-self._scale.x*self.width/2.0
-        elif (self._rotate.angle % 360) == 90.0:
-            return self.x-self._scale.y*self.height/2.0
-        elif (self._rotate.angle % 360) == 270:
-            return self.x-self._scale.y*self.height/2.0
+        if (self._angle % 360) == 0.0:
+            return self.x-self._sx*self.width/2.0
+        elif (self._angle % 360) == 180:
+            return self.x-self._sx*self.width/2.0
+        elif (self._angle % 360) == 90.0:
+            return self.x-self._sy*self.height/2.0
+        elif (self._angle % 360) == 270:
+            return self.x-self._sy*self.height/2.0
         
         p0 = tuple(self.matrix._transform(-self.width/2.0, -self.height/2.0))[0]
         p1 = tuple(self.matrix._transform( self.width/2.0, -self.height/2.0))[0]
@@ -359,14 +387,14 @@ class GObject(object):
         **invariant**: Value must be an ``int`` or ``float``.
         """
         # Optimize for 90 degree turns
-        if (self._rotate.angle % 360) == 0.0:
-            return self.x+self._scale.x*self.width/2.0
-        elif (self._rotate.angle % 360) == 180:
-            return self.x+self._scale.x*self.width/2.0
-        elif (self._rotate.angle % 360) == 90.0:
-            return self.x+self._scale.y*self.height/2.0
-        elif (self._rotate.angle % 360) == 270:
-            return self.x+self._scale.y*self.height/2.0
+        if (self._angle % 360) == 0.0:
+            return self.x+self._sx*self.width/2.0
+        elif (self._angle % 360) == 180:
+            return self.x+self._sx*self.width/2.0
+        elif (self._angle % 360) == 90.0:
+            return self.x+self._sy*self.height/2.0
+        elif (self._angle % 360) == 270:
+            return self.x+self._sy*self.height/2.0
         
         p0 = tuple(self.matrix._transform(-self.width/2.0, -self.height/2.0))[0]
         p1 = tuple(self.matrix._transform( self.width/2.0, -self.height/2.0))[0]
@@ -396,14 +424,14 @@ class GObject(object):
         **invariant**: Value must be an ``int`` or ``float``.
         """
         # Optimize for 90 degree turns
-        if (self._rotate.angle % 360) == 0.0:
-            return self.y+self._scale.y*self.height/2.0
-        elif (self._rotate.angle % 360) == 180:
-            return self.y+self._scale.y*self.height/2.0
-        elif (self._rotate.angle % 360) == 90.0:
-            return self.y+self._scale.x*self.width/2.0
-        elif (self._rotate.angle % 360) == 270:
-            return self.y+self._scale.x*self.width/2.0
+        if (self._angle % 360) == 0.0:
+            return self.y+self._sy*self.height/2.0
+        elif (self._angle % 360) == 180:
+            return self.y+self._sy*self.height/2.0
+        elif (self._angle % 360) == 90.0:
+            return self.y+self._sx*self.width/2.0
+        elif (self._angle % 360) == 270:
+            return self.y+self._sx*self.width/2.0
         
         p0 = tuple(self.matrix._transform(-self.width/2.0, -self.height/2.0))[1]
         p1 = tuple(self.matrix._transform( self.width/2.0, -self.height/2.0))[1]
@@ -433,14 +461,14 @@ class GObject(object):
         **invariant**: Value must be an ``int`` or ``float``.
         """
         # Optimize for 90 degree turns
-        if (self._rotate.angle % 360) == 0.0:
-            return self.y-self._scale.y*self.height/2.0
-        elif (self._rotate.angle % 360) == 180:
-            return self.y-self._scale.y*self.height/2.0
-        elif (self._rotate.angle % 360) == 90.0:
-            return self.y-self._scale.x*self.width/2.0
-        elif (self._rotate.angle % 360) == 270:
-            return self.y-self._scale.x*self.width/2.0
+        if (self._angle % 360) == 0.0:
+            return self.y-self._sy*self.height/2.0
+        elif (self._angle % 360) == 180:
+            return self.y-self._sy*self.height/2.0
+        elif (self._angle % 360) == 90.0:
+            return self.y-self._sx*self.width/2.0
+        elif (self._angle % 360) == 270:
+            return self.y-self._sx*self.width/2.0
         
         p0 = tuple(self.matrix._transform(-self.width/2.0, -self.height/2.0))[1]
         p1 = tuple(self.matrix._transform( self.width/2.0, -self.height/2.0))[1]
@@ -484,6 +512,104 @@ class GObject(object):
             self._build_matrix()
         return self._invrse
 
+    @property
+    def bounds(self):
+        """
+        The axis-aligned bounding box of this shape in window coordinates
+
+        The value is a tuple ``(left, bottom, right, top)``, taking the position, size,
+        angle and scale into account.  It is computed once and then kept until one of
+        these attributes changes.  :class:`GView` uses it to skip objects that are not
+        on screen.
+
+        **invariant**: Either a tuple of four numbers or ``None`` (no known bounds)
+        """
+        if self._aabb is None:
+            self._aabb = self._build_bounds()
+        return self._aabb
+
+
+    # CLASS METHODS
+    @classmethod
+    def color_stats(cls):
+        """
+        Returns: The pair (hits, misses) of the color cache
+
+        These are the number of color conversions (by any shape) that were found in
+        COLOR_CACHE, and the number that were not.  See :meth:`to_rgba` for more
+        information.
+        """
+        return tuple(cls._COLOR_COUNTS)
+
+    @classmethod
+    def to_rgba(cls,value):
+        """
+        Returns: The color value as a tuple of four floats, or None if value is None
+
+        Parsing color names and web colors is slow, and so the result is cached for
+        strings, tuples and lists.  Later conversions of an equal value return the same
+        tuple without checking or parsing it again.  Only the :attr:`COLOR_CACHE_SIZE`
+        most recently used values are kept.  The hits and misses of the cache are
+        counted, and returned by :meth:`color_stats`.
+
+        :param value: The color to convert
+        :type value:  ``None`` or a color (see :func:`is_color`)
+        """
+        if value is None:
+            return None
+        if not type(value) in [str, tuple, list]:
+            # colormodel objects are mutable, so they are never cached
+            assert is_color(value), '%s is not a valid color' % repr(value)
+            return tuple(float(c) for c in value.glColor())
+
+        key = tuple(value) if type(value) == list else value
+        if key in cls.COLOR_CACHE:
+            cls._COLOR_COUNTS[0] += 1
+            rgba = cls.COLOR_CACHE.pop(key)
+            cls.COLOR_CACHE[key] = rgba
+            return rgba
+
+        import introcs
+        assert is_color(value), '%s is not a valid color' % repr(value)
+        if type(value) == str:
+            if value[0] == '#':
+                value = introcs.RGB.CreateWebColor(value).glColor()
+            else:
+                value = introcs.RGB.CreateName(value).glColor()
+        elif len(value) == 3:
+            value = list(value)+[1.0]
+
+        rgba = tuple(float(c) for c in value[:4])
+        cls._COLOR_COUNTS[1] += 1
+        if len(cls.COLOR_CACHE) >= cls.COLOR_CACHE_SIZE:
+            del cls.COLOR_CACHE[next(iter(cls.COLOR_CACHE))]
+        cls.COLOR_CACHE[key] = rgba
+        return rgba
+
+    @classmethod
+    def color_instruction(cls,rgba):
+        """
+        Returns: The shared Kivy Color instruction for the given RGBA tuple
+
+        Every shape of the same color adds this one instruction to its drawing cache,
+        instead of a new instruction of its own.  This is safe as long as no one changes
+        the color of the instruction; to recolor a shape, assign its color attribute.
+        Only the :attr:`COLOR_CACHE_SIZE` most recently used instructions are kept.
+
+        :param rgba: The color of the instruction
+        :type rgba:  4-element tuple of floats between 0 and 1
+        """
+        if rgba in cls.COLOR_INSTRUCTIONS:
+            color = cls.COLOR_INSTRUCTIONS.pop(rgba)
+            cls.COLOR_INSTRUCTIONS[rgba] = color
+            return color
+
+        color = Color(*rgba)
+        if len(cls.COLOR_INSTRUCTIONS) >= cls.COLOR_CACHE_SIZE:
+            del cls.COLOR_INSTRUCTIONS[next(iter(cls.COLOR_INSTRUCTIONS))]
+        cls.COLOR_INSTRUCTIONS[rgba] = color
+        return color
+
 
     # BUILT-IN METHODS
     def __init__(self,**keywords):
@@ -508,12 +634,18 @@ class GObject(object):
         """
         # Set the properties.
         self._defined = False
+        self._x = self._y = self._angle = 0.0
+        self._sx = self._sy = 1.0
+        self._matrix = self._invrse = None
+        self._mtrue = False
+        self._aabb = None
+        self._parent = None
+        self._view = None
 
-        # Create the Kivy transforms for position and size
-        self._trans  = Translate(0,0,0)
-        self._rotate = Rotate(angle=0,axis=(0,0,1))
-        #self._scale  = Scale(1,1,1)
-        self._scale  = Scale(1,1,1)
+        # The Kivy instructions are made when first drawn
+        self._trans = self._rotate = self._scale = self._cache = None
+        self._stale = True
+        self._moved = False
 
         # Now update these with the keywords; size first
         if 'width' in keywords:
@@ -553,6 +685,7 @@ class GObject(object):
         
         # Add a name for debugging
         self.name = keywords['name'] if 'name' in keywords else None
+        self.layer = keywords['layer'] if 'layer' in keywords else 0
     
     def __str__(self):
         """
@@ -594,12 +727,91 @@ class GObject(object):
             point = (point.x,point.y)
         assert is_num_tuple(point,2), "%s is not a valid point" % repr(point)
 
-        if self._rotate.angle != 0.0 or self._scale.x != 1.0 or self._scale.y != 1.0:
+        if self._angle != 0.0 or self._sx != 1.0 or self._sy != 1.0:
             point = tuple(self.matrix.inverse()._transform(point[0],point[1]))
             return abs(point[0]) < self.width/2.0 and abs(point[1]) < self.height/2.0
 
         return abs(point[0]-self.x) < self.width/2.0 and abs(point[1]-self.y) < self.height/2.0
 
+    def contains_many(self,points):
+        """
+        Checks whether this shape contains each of the points
+
+        This is the vectorized form of :meth:`contains`, for picking or collision tests
+        against many points at once.  The points are checked in a single pass of numpy
+        arithmetic, and rotated objects are no slower than the others.
+
+        :param points: the points to check
+        :type points:  array-like of shape (N,2)
+
+        :return: a mask that is True for each point contained in this shape
+        :rtype:  numpy array of N ``bool``
+        """
+        xs, ys = self._to_local(points)
+        return (np.abs(xs) < self.width/2.0) & (np.abs(ys) < self.height/2.0)
+
+    def overlaps(self,other):
+        """
+        Checks whether this shape overlaps another one
+
+        Both shapes are treated as their (transformed) bounding rectangles, so this is
+        exact for rectangles and images.  Shapes that only touch along an edge do not
+        overlap.
+
+        Most objects are never rotated, and for those this method only compares the
+        cached :attr:`bounds`.  Rotated objects need a slower separating axis test.
+
+        :param other: the shape to check
+        :type other: :class:`GObject`
+
+        :return: True if the shapes overlap
+        :rtype:  ``bool``
+        """
+        assert isinstance(other,GObject), '%s is not a GObject' % repr(other)
+        mine = self.bounds
+        theirs = other.bounds
+        if mine is None or theirs is None:
+            return False
+        if (mine[0] >= theirs[2] or theirs[0] >= mine[2] or
+            mine[1] >= theirs[3] or theirs[1] >= mine[3]):
+            return False
+        if self._angle % 90 == 0 and other._angle % 90 == 0:
+            return True
+        return self._overlaps_box(other)
+
+    def overlaps_any(self,objects):
+        """
+        Checks whether this shape overlaps any of the given shapes
+
+        This is the bulk form of :meth:`overlaps`.  The bounds of this shape are only
+        looked up once, and most of the shapes are rejected by comparing bounds alone.
+        This shape is skipped if it is in the list.
+
+        :param objects: the shapes to check
+        :type objects: list or tuple of :class:`GObject`
+
+        :return: True if this shape overlaps at least one of the others
+        :rtype:  ``bool``
+        """
+        assert is_gobject_list(objects), '%s is not a list of valid objects' % repr(objects)
+        mine = self.bounds
+        if mine is None:
+            return False
+        left, bottom, right, top = mine
+        rotated = self._angle % 90 != 0
+        for other in objects:
+            if other is self:
+                continue
+            theirs = other.bounds
+            if (theirs is None or left >= theirs[2] or theirs[0] >= right or
+                bottom >= theirs[3] or theirs[1] >= top):
+                continue
+            if not rotated and other._angle % 90 == 0:
+                return True
+            if self._overlaps_box(other):
+                return True
+        return False
+
     def transform(self,point):
         """
         Transforms the point to the local coordinate system
@@ -631,34 +843,203 @@ class GObject(object):
         :param view: view to draw to
         :type view:  :class:`GView`
         """
+        self._prepare()
         try:
-            view.draw(self._cache)
+            view.draw(self._cache,self.bounds,self._layer,self._draw_state())
         except:
             raise IOError('Cannot draw %s since it was not initialized properly' % repr(self))
 
     # HIDDEN METHODS
+    def _prepare(self):
+        """
+        Brings the drawing cache up to date before the object is drawn.
+
+        The cache is built if it does not exist or is out of date.  Otherwise, only the
+        transforms are updated, and only if the object moved since it was last drawn.
+        """
+        if self._stale:
+            self._reset()
+        elif self._moved:
+            self._trans.xy = (self._x,self._y)
+            self._rotate.angle = self._angle
+            self._scale.xyz = (self._sx,self._sy,1.0)
+            self._moved = False
+
     def _reset(self):
         """
         Resets the drawing cache.
         """
-        self._cache = InstructionGroup()
+        self._trans  = Translate(self._x,self._y,0)
+        self._rotate = Rotate(angle=self._angle,axis=(0,0,1))
+        self._scale  = Scale(self._sx,self._sy,1)
+        # Keep the same group, so that a view showing this object need not change
+        if self._cache is None:
+            self._cache = InstructionGroup()
+        else:
+            self._cache.clear()
         self._cache.add(PushMatrix())
         self._cache.add(self._trans)
         self._cache.add(self._rotate)
         self._cache.add(self._scale)
+        self._stale = False
+        self._moved = False
+    
+    def _to_local(self,points):
+        """
+        Returns the points transformed to the local coordinate system.
+
+        This undoes the position, angle and scale of this shape.  The value is a pair
+        of numpy arrays, the x and y coordinates of the transformed points.
+
+        :param points: the points to transform
+        :type points:  array-like of shape (N,2)
+        """
+        points = np.asarray(points,dtype=float)
+        assert points.ndim == 2 and points.shape[1] == 2, '%s is not an array of points' % repr(points)
+        xs = points[:,0]-self._x
+        ys = points[:,1]-self._y
+        if self._angle != 0.0:
+            rads = math.radians(self._angle)
+            cos, sin = math.cos(rads), math.sin(rads)
+            xs, ys = cos*xs+sin*ys, cos*ys-sin*xs
+        if self._sx != 1.0:
+            xs = xs/self._sx
+        if self._sy != 1.0:
+            ys = ys/self._sy
+        return (xs,ys)
+
+    def _invalidate(self):
+        """
+        Forgets the cached bounds of this shape, and of every scene containing it.
+
+        A scene only caches its bounds once its children have cached theirs.  So when
+        a shape has no cached bounds, neither does any scene above it, and the walk up
+        the scene graph stops there.  This keeps repeated moves of a shape cheap.
+        """
+        if not self._defined:
+            return
+        self._touch()
+        node = self
+        while not node is None and not node._aabb is None:
+            node._aabb = None
+            node = node._parent
+
+    def _touch(self):
+        """
+        Tells the view showing this shape (see :meth:`GView.add`) that it changed.
+
+        A shape in a scene tells the view showing the outermost scene instead.  The
+        view brings the shape up to date at the end of the frame.
+        """
+        if not self._defined:
+            return
+        node = self
+        while not node._parent is None:
+            node = node._parent
+        if not node._view is None:
+            node._view._touched.add(node)
+
+    def _draw_state(self):
+        """
+        Returns the OpenGL state set by this shape, as a pair (texture, color).
+
+        The texture is given by its OpenGL id (0 for none), and the color as a tuple.
+        Images cut from the same texture atlas share a texture id.
+        """
+        texture = getattr(self,'_texture',None)
+        return (0 if texture is None else texture.id, self._fillcolor)
+
+    def _local_bounds(self):
+        """
+        Returns the bounding box of this shape before it is transformed.
+
+        The value is a tuple ``(left, bottom, right, top)`` relative to the center, or
+        ``None`` if the shape has no known bounds.
+        """
+        return (-self.width/2.0,-self.height/2.0,self.width/2.0,self.height/2.0)
+
+    def _build_bounds(self):
+        """
+        Returns the bounding box of this shape in window coordinates.
+
+        The local box is scaled and rotated about the center, and the rotated box is
+        then enclosed in an axis-aligned one.
+        """
+        local = self._local_bounds()
+        if local is None:
+            return None
+
+        sx, sy = self._sx, self._sy
+        cx = sx*(local[0]+local[2])/2.0
+        cy = sy*(local[1]+local[3])/2.0
+        hw = abs(sx)*(local[2]-local[0])/2.0
+        hh = abs(sy)*(local[3]-local[1])/2.0
+
+        angle = self._angle % 360
+        if angle != 0.0:
+            rads = math.radians(angle)
+            cos, sin = math.cos(rads), math.sin(rads)
+            cx, cy = cos*cx-sin*cy, sin*cx+cos*cy
+            hw, hh = abs(cos)*hw+abs(sin)*hh, abs(sin)*hw+abs(cos)*hh
+
+        cx += self._x
+        cy += self._y
+        return (cx-hw,cy-hh,cx+hw,cy+hh)
+
+    def _build_box(self):
+        """
+        Returns the bounding rectangle of this shape in window coordinates.
+
+        Unlike :attr:`bounds`, this rectangle turns with the shape.  The value is a tuple
+        ``(cx, cy, ux, uy, vx, vy)``, where ``(cx,cy)`` is the center and ``(ux,uy)`` and
+        ``(vx,vy)`` run from the center to the middle of the right and top edges.
+        """
+        local = self._local_bounds()
+        sx, sy = self._sx, self._sy
+        cx = sx*(local[0]+local[2])/2.0
+        cy = sy*(local[1]+local[3])/2.0
+        hw = sx*(local[2]-local[0])/2.0
+        hh = sy*(local[3]-local[1])/2.0
+
+        rads = math.radians(self._angle)
+        cos, sin = math.cos(rads), math.sin(rads)
+        return (cos*cx-sin*cy+self._x,sin*cx+cos*cy+self._y,cos*hw,sin*hw,-sin*hh,cos*hh)
+
+    def _overlaps_box(self,other):
+        """
+        Returns True if the bounding rectangles of the two shapes overlap.
+
+        This is a separating axis test.  The rectangles are disjoint exactly when their
+        shadows on an edge of one of them do not meet.  The edges need not have unit
+        length, as every term of the comparison is scaled by the same amount.
+
+        :param other: the shape to check
+        :type other: :class:`GObject`
+        """
+        box1 = self._build_box()
+        box2 = other._build_box()
+        dx = box2[0]-box1[0]
+        dy = box2[1]-box1[1]
+        for box in (box1,box2):
+            for ax, ay in ((box[2],box[3]),(box[4],box[5])):
+                reach  = abs(box1[2]*ax+box1[3]*ay)+abs(box1[4]*ax+box1[5]*ay)
+                reach += abs(box2[2]*ax+box2[3]*ay)+abs(box2[4]*ax+box2[5]*ay)
+                if abs(dx*ax+dy*ay) >= reach:
+                    return False
+        return True
     
     def _build_matrix(self):
         """
         Builds the transform matrices after a settings change.
         """
         self._matrix = Matrix()
-        self._matrix.scale(self._scale.x,self._scale.y)
-        self._matrix.rotate(self._rotate.angle)
-        self._matrix.translate(self._trans.x,self._trans.y)
+        self._matrix.scale(self._sx,self._sy)
+        self._matrix.rotate(self._angle)
+        self._matrix.translate(self._x,self._y)
         self._invrse = Matrix()
-        self._invrse.translate(-self._trans.x,-self._trans.y)
-        self._invrse.rotate(-self._rotate.angle)
-        self._invrse.scale(1.0/self._scale.x,1.0/self._scale.y)
+        self._invrse.translate(-self._x,-self._y)
+        self._invrse.rotate(-self._angle)
+        self._invrse.scale(1.0/self._sx,1.0/self._sy)
         self._mtrue = True
 
 
@@ -679,7 +1060,12 @@ class GScene(GObject):
     read-only.  These values are computed from the list of objects stored in the scene.
 
     All objects stored in a ``GScene`` are drawn as if the point (x,y) is the origin.
+
+    A scene caches its bounds (and so its size), and its children tell it when they move
+    or change shape.  As a child only knows about one scene, an object should not be
+    stored in more than one scene at a time.
     """
+    __slots__ = ('_children','_box')
 
     # MUTABLE PROPERTIES
     @property
@@ -697,9 +1083,15 @@ class GScene(GObject):
     @children.setter
     def children(self,value):
         assert is_gobject_list(value), '%s is not a list of valid objects' % repr(value)
-        self._children = list(value)
         if self._defined:
-            self._reset()
+            for x in self._children:
+                if x._parent is self:
+                    x._parent = None
+        self._children = list(value)
+        for x in self._children:
+            x._parent = self
+        self._stale = True
+        self._invalidate()
 
 
     # IMMUTABLE PROPERTIES
@@ -709,16 +1101,12 @@ class GScene(GObject):
         The horizontal width of this shape.
 
         The value is the width of the smallest bounding box that contains all of the
-        objects in this scene (and the center)
+        objects in this scene (and the center).  It is cached along with the bounds.
 
-        **invariant**: Value must be an ``int`` or ``float`` > 0
+        **invariant**: Value must be an ``int`` or ``float`` >= 0
         """
-        max = 0
-        for x in self.children:
-            w = x.x+x.width/2.0
-            if w > max:
-                max = w
-        return max*2
+        box = self._local_box()
+        return 0 if box is None else 2*max(box[2],-box[0],0)
 
     @property
     def height(self):
@@ -726,16 +1114,12 @@ class GScene(GObject):
         The vertical height of this path.
 
         The value is the height of the smallest bounding box that contains all of the
-        objects in this scene (and the center)
+        objects in this scene (and the center).  It is cached along with the bounds.
 
-        **invariant**: Value must be an ``int`` or ``float`` > 0
+        **invariant**: Value must be an ``int`` or ``float`` >= 0
         """
-        max = 0
-        for x in self.children:
-            h = x.y+x.height/2.0
-            if h > max:
-                max = h
-        return max*2
+        box = self._local_box()
+        return 0 if box is None else 2*max(box[3],-box[1],0)
 
 
     # BUILT-IN METHODS
@@ -756,9 +1140,9 @@ class GScene(GObject):
         :type keywords:  keys are attribute names
         """
         self._defined = False
+        self._box = None
         self.children = keywords['children'] if 'children' in keywords else []
         GObject.__init__(self,**keywords)
-        self._reset()
         self._defined = True
 
 
@@ -786,13 +1170,27 @@ class GScene(GObject):
                 result = child.select(point)
             elif child.contains(point):
                 result = child
-            if not child is None:
-                return child
+            if not result is None:
+                return result
 
         return None
 
 
     # HIDDEN METHODS
+    def _prepare(self):
+        """
+        Brings the drawing caches of this scene and its children up to date.
+
+        The scene cache holds the caches of the children, so it is built again if the
+        cache of any child was replaced.
+        """
+        for x in self._children:
+            cache = x._cache
+            x._prepare()
+            if not x._cache is cache:
+                self._stale = True
+        GObject._prepare(self)
+
     def _reset(self):
         """
         Resets the drawing cache
@@ -801,3 +1199,26 @@ class GScene(GObject):
         for x in self.children:
             self._cache.add(x._cache)
         self._cache.add(PopMatrix())
+
+    def _local_box(self):
+        """
+        Returns the box enclosing the bounds of the children, computing it if needed.
+        """
+        if self._aabb is None:
+            self._aabb = self._build_bounds()
+        return self._box
+
+    def _local_bounds(self):
+        """
+        Returns the box enclosing the bounds of the children, or None if there are none.
+
+        The box is kept for :meth:`_local_box`, as it is only computed again when the
+        bounds of a child change.
+        """
+        boxes = [x.bounds for x in self._children]
+        if not boxes or None in boxes:
+            self._box = None
+        else:
+            self._box = (min(b[0] for b in boxes),min(b[1] for b in boxes),
+                         max(b[2] for b in boxes),max(b[3] for b in boxes))
+        return self._box
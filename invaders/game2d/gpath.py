@@ -11,6 +11,7 @@ Date:   August 1, 2017 (Python 3 version)
 from kivy.graphics import *
 from kivy.graphics.instructions import *
 from .gobject import GObject
+import numpy as np
 
 
 def same_side(p1, p2, a, b):
@@ -57,6 +58,41 @@ def in_triangle(p, t):
             same_side(p, t[4:6], t[0:2], t[2:4]))
 
 
+def in_triangles(xs, ys, t):
+    """
+    Checks which points are inside of which triangles
+    
+    This is the vectorized form of :func:`in_triangle`, checking N points against M 
+    triangles at once.  As with that function, points on an edge are inside.  A 
+    degenerate triangle (with all three points on a line) contains no points.
+    
+    :param xs: The x coordinates of the points
+    :type xs:  numpy array of N ``float``
+    
+    :param ys: The y coordinates of the points
+    :type ys:  numpy array of N ``float``
+    
+    :param t: The triangles, each defined by 3 points
+    :type t:  numpy array of shape (M,6)
+    
+    :return: A mask that is True where point i is in triangle j
+    :rtype:  numpy array of shape (N,M) of ``bool``
+    """
+    px = xs[:,np.newaxis]
+    py = ys[:,np.newaxis]
+    ax, ay, bx, by, cx, cy = (t[:,ii] for ii in range(6))
+    
+    # For each edge, the point must be on the same side as the opposite vertex
+    result = None
+    for (x0, y0, x1, y1, x2, y2) in ((bx,by,cx,cy,ax,ay),(ax,ay,cx,cy,bx,by),(ax,ay,bx,by,cx,cy)):
+        ex = x1-x0
+        ey = y1-y0
+        area = ex*(y2-y0)-ey*(x2-x0)
+        side = ((ex*(py-y0)-ey*(px-x0))*area >= 0) & (area != 0)
+        result = side if result is None else result & side
+    return result
+
+
 def is_point_tuple(t,minsize):
     """
     Checks whether a value is an EVEN sequence of numbers.
@@ -103,6 +139,7 @@ class GPath(GObject):
     are 0.  However, if they are nonzero, then Python will add them to all of the points
     in the path, shifting the path accordingly.
     """
+    __slots__ = ('_points','_linewidth')
     
     # MUTABLE PROPERTIES
     @property
@@ -119,8 +156,8 @@ class GPath(GObject):
     def points(self,value):
         assert is_point_tuple(value,2),'value %s is not a valid list of points' %  repr(value)
         self._points = tuple(value)
-        if self._defined:
-            self._reset()
+        self._stale = True
+        self._invalidate()
     
     @property
     def linewidth(self):
@@ -138,8 +175,8 @@ class GPath(GObject):
         assert type(value) in [int,float], 'value %s is not a number' % repr(value)
         assert value >= 0, 'value %s is negative' % repr(value)
         self._linewidth = value
-        if self._defined:
-            self._reset()
+        self._stale = True
+        self._invalidate()
     
     
     # IMMUTABLE PROPERTIES
@@ -194,7 +231,6 @@ class GPath(GObject):
         if not 'linecolor' in keywords:
             keywords['linecolor'] = (1,1,1,1)
         GObject.__init__(self,**keywords)
-        self._reset()
         self._defined = True
     
     
@@ -213,6 +249,20 @@ class GPath(GObject):
         """
         return False
     
+    def contains_many(self,points):
+        """
+        Checks whether this shape contains each of the points
+        
+        This method always returns an all `False` mask as a ``GPath`` has no interior.
+        
+        :param points: the points to check
+        :type points:  array-like of shape (N,2)
+        
+        :return: a mask that is True for each point contained in this shape
+        :rtype:  numpy array of N ``bool``
+        """
+        return np.zeros(len(points),dtype=bool)
+    
     def near(self,point):
         """
         Checks whether this path is near the given point
@@ -256,10 +306,19 @@ class GPath(GObject):
         """
         GObject._reset(self)
         if not self._linecolor is None:
-            self._cache.add(self._linecolor)
+            self._cache.add(self.color_instruction(self._linecolor))
             line = Line(points=self.points,cap='round',joint='round',width=self.linewidth)
             self._cache.add(line)
         self._cache.add(PopMatrix())
+    
+    def _local_bounds(self):
+        """
+        Returns the bounding box of the points, grown by the width of the line.
+        """
+        px = self.points[::2]
+        py = self.points[1::2]
+        pad = self.linewidth
+        return (min(px)-pad,min(py)-pad,max(px)+pad,max(py)+pad)
 
 
 # #mark -
@@ -280,6 +339,7 @@ class GTriangle(GPath):
     will add them to the triangle vertices.  Similarly, the attributes `width` and 
     `height` are immutable, and are computed directly from the points
     """
+    __slots__ = ()
     
     # MUTABLE PROPERTIES
     @property
@@ -297,8 +357,8 @@ class GTriangle(GPath):
         assert is_point_tuple(value,3),'value %s is not a valid list of points' %  repr(value)
         assert len(value) == 6, 'value %s does not have the right length'  %  repr(value)
         self._points = tuple(value)
-        if self._defined:
-            self._reset()
+        self._stale = True
+        self._invalidate()
     
     
     # BUILT-IN METHODS
@@ -322,7 +382,6 @@ class GTriangle(GPath):
         self.linewidth = keywords['linewidth'] if 'linewidth' in keywords else 0.0
         self.points = keywords['points'] if 'points' in keywords else (-100,-58,0,116,100,-58)
         GObject.__init__(self,**keywords)
-        self._reset()
         self._defined = True
     
     
@@ -347,6 +406,23 @@ class GTriangle(GPath):
         
         return in_triangle(points,self._points)
     
+    def contains_many(self,points):
+        """
+        Checks whether this shape contains each of the points
+        
+        This is the vectorized form of :meth:`contains`.  The points are moved into the
+        coordinate system of the vertices, so this also works for shifted or rotated 
+        triangles.
+        
+        :param points: the points to check
+        :type points:  array-like of shape (N,2)
+        
+        :return: a mask that is True for each point contained in this shape
+        :rtype:  numpy array of N ``bool``
+        """
+        xs, ys = self._to_local(points)
+        return in_triangles(xs,ys,np.array([self._points],dtype=float))[:,0]
+    
     
     # HIDDEN METHODS
     def _reset(self):
@@ -362,13 +438,13 @@ class GTriangle(GPath):
         
         mesh = Mesh(vertices=vertices, indices=range(3), mode='triangle_strip')
         if not self._fillcolor is None:
-            self._cache.add(self._fillcolor)
+            self._cache.add(self.color_instruction(self._fillcolor))
         self._cache.add(mesh)
         
         if self.linewidth > 0:
             line = Line(points=self.points,joint='miter',close=True,width=self.linewidth)
             if not self._linecolor is None:
-                self._cache.add(self._linecolor)
+                self._cache.add(self.color_instruction(self._linecolor))
             self._cache.add(line)
         
         self._cache.add(PopMatrix())
@@ -400,6 +476,7 @@ class GPolygon(GPath):
     As with :class:`GPath`, the attributes ``width`` and ``height`` are immutable, and 
     are computed directly from the points
     """
+    __slots__ = ('_source','_source_width','_source_height','_mesh')
     
     # MUTABLE PROPERTIES
     @property
@@ -416,8 +493,8 @@ class GPolygon(GPath):
     def points(self,value):
         assert is_point_tuple(value,3),'value %s is not a valid list of points' %  repr(value)
         self._points = tuple(value)
-        if self._defined:
-            self._reset()
+        self._stale = True
+        self._invalidate()
     
     @property
     def source(self):
@@ -433,8 +510,8 @@ class GPolygon(GPath):
         from .app import GameApp
         assert value is None or GameApp.is_image(value), 'value %s is not an image file' % repr(value)
         self._source = value
-        if self._defined:
-            self._reset()
+        self._stale = True
+        self._touch()
     
     @property
     def source_width(self):
@@ -458,8 +535,8 @@ class GPolygon(GPath):
     def source_width(self,value):
         assert value is None or type(value) in [int,float], 'value %s is not a valid width' % repr(value)
         self._source_width = None
-        if self._defined:
-            self._reset()
+        self._stale = True
+        self._touch()
     
     @property
     def source_height(self):
@@ -483,8 +560,8 @@ class GPolygon(GPath):
     def source_height(self,value):
         assert value is None or _is_num(value), 'value %s is not a valid width' % repr(value)
         self._source_height = None
-        if self._defined:
-            self._reset()
+        self._stale = True
+        self._touch()
     
     
     # BUILT-IN METHODS
@@ -511,7 +588,6 @@ class GPolygon(GPath):
         self.source_width  = keywords['source_width']  if 'source_width'  in keywords else None
         self.source_height = keywords['source_height'] if 'source_height' in keywords else None
         GObject.__init__(self,**keywords)
-        self._reset()
         self._defined = True
     
     
@@ -541,6 +617,26 @@ class GPolygon(GPath):
         
         return found
     
+    def contains_many(self,points):
+        """
+        Checks whether this shape contains each of the points
+        
+        This is the vectorized form of :meth:`contains`.  Each point is checked against
+        every triangle of the fan (including the one that closes the polygon) at once.
+        
+        :param points: the points to check
+        :type points:  array-like of shape (N,2)
+        
+        :return: a mask that is True for each point contained in this shape
+        :rtype:  numpy array of N ``bool``
+        """
+        xs, ys = self._to_local(points)
+        verts = np.array(self._points,dtype=float).reshape(-1,2)
+        fan = np.zeros((len(verts),6))
+        fan[:,2:4] = verts
+        fan[:,4:6] = np.roll(verts,-1,axis=0)
+        return in_triangles(xs,ys,fan).any(axis=1)
+    
     
     # HIDDEN METHODS
     def _make_mesh(self):
@@ -581,12 +677,13 @@ class GPolygon(GPath):
         GObject._reset(self)
         self._make_mesh()
         
-        self._cache.add(self._fillcolor)
+        if not self._fillcolor is None:
+            self._cache.add(self.color_instruction(self._fillcolor))
         self._cache.add(self._mesh)
         
         if self.linewidth > 0:
             line = Line(points=self.points,joint='miter',close=True,width=self.linewidth)
-            self._cache.add(self._linecolor)
+            self._cache.add(self.color_instruction(self._linecolor))
             self._cache.add(line)
         
         self._cache.add(PopMatrix())
@@ -10,7 +10,7 @@ Date:   August 1, 2017 (Python 3 version)
 """
 from kivy.graphics import *
 from kivy.graphics.instructions import *
-from kivy.uix.label import Label
+from kivy.core.text import Label as CoreLabel
 from kivy.uix.image import Image
 from .gobject import GObject
 from .app import GameApp
@@ -28,6 +28,7 @@ class GRectangle(GObject):
     The only new property for this class is ``linewidth``, which controls the width of
     the border around the rectangle.  For all other properties, see the documentation
     for :class:`GObject`."""
+    __slots__ = ('_linewidth',)
     
     # MUTABLE PROPERTIES 
     @property
@@ -46,8 +47,8 @@ class GRectangle(GObject):
         assert type(value) in [int,float], '%s is not a number' % repr(value)
         assert value >= 0, '%s is negative' % repr(value)
         self._linewidth = value
-        if self._defined:
-            self._reset()
+        self._stale = True
+        self._invalidate()
     
     
     # BUILT-IN METHODS
@@ -71,7 +72,6 @@ class GRectangle(GObject):
         self.linewidth = keywords['linewidth'] if 'linewidth' in keywords else 0.0
         # Always delay the call to parent class, to avoid reset
         GObject.__init__(self,**keywords)
-        self._reset()
         self._defined = True
     
     
@@ -86,16 +86,29 @@ class GRectangle(GObject):
         
         if not self._fillcolor is None:
             fill = Rectangle(pos=(x,y), size=(self.width, self.height))
-            self._cache.add(self._fillcolor)
+            self._cache.add(self.color_instruction(self._fillcolor))
             self._cache.add(fill)
         
         if not self._linecolor is None and self.linewidth > 0:
             line = Line(rectangle=(x,y,self.width,self.height),joint='miter',
                         close=True,width=self.linewidth)
-            self._cache.add(self._linecolor)
+            self._cache.add(self.color_instruction(self._linecolor))
             self._cache.add(line)
         
         self._cache.add(PopMatrix())
+    
+    def _local_bounds(self):
+        """
+        Returns the bounding box of this shape before it is transformed.
+        
+        The box is grown by the width of the border, if there is one.
+        """
+        w = self.width/2.0
+        h = self.height/2.0
+        if not self._linecolor is None:
+            w += self.linewidth
+            h += self.linewidth
+        return (-w,-h,w,h)
 
 
 # #mark -
@@ -111,6 +124,7 @@ class GEllipse(GRectangle):
     This class has exactly the same properties as :class:`GRectangle`.  See the 
     documentation of that class and :class:`GObject` for a complete list of attributes.
     """
+    __slots__ = ()
     
     # BUILT-IN METHODS
     def __init__(self,**keywords):
@@ -150,7 +164,7 @@ class GEllipse(GRectangle):
         
         rx = self.width/2.0
         ry = self.height/2.0
-        if self._rotate.angle == 0.0:
+        if self._angle == 0.0:
             dx = (point[0]-self.x)*(point[0]-self.x)/(rx*rx)
             dy = (point[1]-self.y)*(point[1]-self.y)/(ry*ry)
         else:
@@ -159,6 +173,24 @@ class GEllipse(GRectangle):
             dy = p[1]*p[1]/(ry*ry)
         
         return (dx+dy) <= 1.0
+
+    def contains_many(self,points):
+        """
+        Checks whether this shape contains each of the points
+
+        This is the vectorized form of :meth:`contains`.  It checks every point against
+        the radius in a single pass of numpy arithmetic.
+
+        :param points: the points to check
+        :type points:  array-like of shape (N,2)
+
+        :return: a mask that is True for each point contained in this shape
+        :rtype:  numpy array of N ``bool``
+        """
+        xs, ys = self._to_local(points)
+        rx = self.width/2.0
+        ry = self.height/2.0
+        return (xs*xs/(rx*rx)+ys*ys/(ry*ry)) <= 1.0
     
     
     # HIDDEN METHODS
@@ -172,12 +204,12 @@ class GEllipse(GRectangle):
         
         if not self._fillcolor is None:
             fill = Ellipse(pos=(x,y), size=(self.width,self.height))
-            self._cache.add(self._fillcolor)
+            self._cache.add(self.color_instruction(self._fillcolor))
             self._cache.add(fill)
         
         if not self._linecolor is None and self.linewidth > 0:
             line = Line(ellipse=(x,y,self.width,self.height),close=True,width=self.linewidth)
-            self._cache.add(self._linecolor)
+            self._cache.add(self.color_instruction(self._linecolor))
             self._cache.add(line)
         
         self._cache.add(PopMatrix())
@@ -204,6 +236,7 @@ class GImage(GRectangle):
     If the image supports transparency, then this object can be used to represent irregular 
     shapes.  However, the :meth:`contains` method still treats this shape as a  rectangle.
     """
+    __slots__ = ('_source','_texture')
     
     # MUTABLE PROPERTIES
     @property
@@ -220,7 +253,7 @@ class GImage(GRectangle):
         assert value is None or GameApp.is_image(value), '%s is not an image file' % repr(value)
         self._source = value
         if self._defined:
-            self._reset()
+            self._resize()
     
     
     # BUILT-IN METHODS
@@ -245,15 +278,15 @@ class GImage(GRectangle):
         self.source = keywords['source'] if 'source' in keywords else None
         self._texture = None
         GRectangle.__init__(self,**keywords)
+        self._resize()
         self._defined = True
     
     
     # HIDDEN METHODS
-    def _reset(self):
+    def _resize(self):
         """
-        Resets the drawing cache.
+        Loads the texture, and sizes the image to fit it unless the size was given.
         """
-        # Texture must load FIRST
         self._texture = GameApp.load_texture(self.source)
         if self._texture:
             if not self._set_width:
@@ -262,8 +295,13 @@ class GImage(GRectangle):
                 self.height = self._texture.height
         else:
             print('Failed to load',repr(self.source))
-        
-        # THEN we can reset
+        self._stale = True
+        self._touch()
+    
+    def _reset(self):
+        """
+        Resets the drawing cache.
+        """
         GObject._reset(self)
         x = -self.width/2.0
         y = -self.height/2.0
@@ -271,14 +309,14 @@ class GImage(GRectangle):
         
         fill = Rectangle(pos=(x,y), size=(self.width, self.height),texture=self._texture)
         if not self._fillcolor is None:
-            self._cache.add(self._fillcolor)
+            self._cache.add(self.color_instruction(self._fillcolor))
         else:
-            self._cache.add(Color(1,1,1))
+            self._cache.add(self.color_instruction((1.0,1.0,1.0,1.0)))
         self._cache.add(fill)
         
         if not self._linecolor is None and self.linewidth > 0:
             line = Line(rectangle=(x,y,self.width,self.height),joint='miter',close=True,width=self.linewidth)
-            self._cache.add(self._linecolor)
+            self._cache.add(self.color_instruction(self._linecolor))
             self._cache.add(line)
         
         self._cache.add(PopMatrix())
@@ -307,7 +345,12 @@ class GLabel(GRectangle):
     to the font by filename, including the .ttf. If you give no name, it will use the 
     default Kivy font.  The `bold` attribute only works for the default Kivy font; for 
     other fonts you will need the .ttf file for the bold version of that font.  See the
-    provided `ComicSans.ttf` and `ComicSansBold.ttf` for an example."""
+    provided `ComicSans.ttf` and `ComicSansBold.ttf` for an example.
+    
+    Rendered text is cached (see :meth:`GameApp.load_text`), so labels with the same
+    text, font and color share a single texture, and making one is cheap."""
+    __slots__ = ('_label','_fsize','_halign','_valign','_hanchor','_vanchor','_ha','_hv',
+                 '_texture')
     
     # MUTABLE PROPERTIES
     @property
@@ -322,8 +365,9 @@ class GLabel(GRectangle):
     def font_size(self,value):
         assert type(value) in [int,float], 'value %s is not a number' % repr(value)
         self._fsize = value
-        self._label.font_size = value
-        self._label.texture_update()
+        self._label.options['font_size'] = value
+        if self._defined:
+            self._resize()
     
     @property
     def font_name(self):
@@ -331,14 +375,15 @@ class GLabel(GRectangle):
         The file name for the .ttf file to use as a font
         
         **Invariant**: Must be a string referring to a .ttf file in folder Fonts"""
-        return self._label.font_name
+        return self._label.options['font_name']
     
     @font_name.setter
     def font_name(self,value):
         from .app import GameApp
         assert GameApp.is_font(value), 'value %s is not a font name' % repr(value)
-        self._label.font_name = value
-        self._label.texture_update()
+        self._label.options['font_name'] = value
+        if self._defined:
+            self._resize()
     
     @property
     def bold(self):
@@ -350,13 +395,14 @@ class GLabel(GRectangle):
         `ComicSans.ttf` and `ComicSansBold.ttf` for an example.
         
         **Invariant**: Must be a boolean"""
-        return self._label.bold
+        return self._label.options['bold']
 
     @bold.setter
     def bold(self,value):
         assert type(value) == bool, repr(value)+' is not a bool'
-        self._label.bold = value
-        self._label.texture_update()
+        self._label.options['bold'] = value
+        if self._defined:
+            self._resize()
 
     @property
     def text(self):
@@ -374,7 +420,8 @@ class GLabel(GRectangle):
     def text(self,value):
         assert type(value) == str, 'value %s is not a string' % repr(value)
         self._label.text = value
-        self._label.texture_update()
+        if self._defined:
+            self._resize()
     
     @property
     def halign(self):
@@ -396,9 +443,9 @@ class GLabel(GRectangle):
     def halign(self,value):
         assert value in ('left','right','center'), 'value %s is not a valid horizontal alignment' % repr(value)
         self._halign = value
-        self._label.halign = value
+        self._label.options['halign'] = value
         if self._defined:
-            self._reset()
+            self._resize()
     
     @property
     def valign(self):
@@ -420,9 +467,9 @@ class GLabel(GRectangle):
     def valign(self,value):
         assert value in ('top','middle','bottom'), 'value %s is not a valid vertical alignment' % repr(value)
         self._valign = value
-        self._label.valign = value
+        self._label.options['valign'] = value
         if self._defined:
-            self._reset()
+            self._resize()
     
     
     # REDEFINED PROPERTIES
@@ -432,13 +479,15 @@ class GLabel(GRectangle):
         The horizontal coordinate of the object center.
         
         **Invariant**: Must be an int or float."""
-        return self._trans.x
+        return self._x
     
     @x.setter
     def x(self,value):
         assert type(value) in [int,float], 'value %s is not a number' % repr(value)
-        self._trans.x = float(value)
+        self._x = float(value)
         self._mtrue = False
+        self._moved = True
+        self._invalidate()
         self._hanchor = 'center'
         self._ha = value
     
@@ -448,13 +497,15 @@ class GLabel(GRectangle):
         The vertical coordinate of the object center..
         
         **Invariant**: Must be an int or float."""
-        return self._trans.y
+        return self._y
     
     @y.setter
     def y(self,value):
         assert type(value) in [int,float], 'value %s is not a number' % repr(value)
-        self._trans.y = float(value)
+        self._y = float(value)
         self._mtrue = False
+        self._moved = True
+        self._invalidate()
         self._vanchor = 'center'
         self._hv = value
     
@@ -473,7 +524,7 @@ class GLabel(GRectangle):
         
         **Invariant**: Must be an int or float.
         """
-        if self._rotate.angle == 0.0:
+        if self._angle == 0.0:
             return self.x-self.width/2.0
         
         p0 = self.matrix._transform(self.x-self.width/2.0, self.y-self.height/2.0)[0]
@@ -505,7 +556,7 @@ class GLabel(GRectangle):
         
         **Invariant**: Must be an int or float.
         """
-        if self._rotate.angle == 0.0:
+        if self._angle == 0.0:
             return self.x+self.width/2.0
         
         p0 = self.matrix._transform(self.x-self.width/2.0, self.y-self.height/2.0)[0]
@@ -537,7 +588,7 @@ class GLabel(GRectangle):
         
         **Invariant**: Must be an int or float.
         """
-        if self._rotate.angle == 0.0:
+        if self._angle == 0.0:
             return self.y+self.height/2.0
         
         p0 = self.matrix._transform(self.x-self.width/2.0, self.y-self.height/2.0)[1]
@@ -568,7 +619,7 @@ class GLabel(GRectangle):
         **Warning**: Accessing this value on a rotated object may slow down your framerate.
         **Invariant**: Must be an int or float.
         """
-        if self._rotate.angle == 0.0:
+        if self._angle == 0.0:
             return self.y-self.height/2.0
         
         p0 = self.matrix._transform(self.x-self.width/2.0, self.y-self.height/2.0)[1]
@@ -604,16 +655,18 @@ class GLabel(GRectangle):
         self._defined = False
         self._hanchor = 'center'
         self._vanchor = 'center'
+        self._texture = None
         
         sanitized = {}
-        excludes  = ['linewidth','linecolor','fillcolor','halign','valign','left','bottom']
+        excludes  = ['linewidth','linecolor','fillcolor','halign','valign','left','bottom',
+                     'right','top','x','y','width','height','angle','scale','name']
         for key in keywords:
             if not key in excludes:
                 sanitized[key] = keywords[key]
         
-        self._label = Label(**sanitized)
-        self._label.size_hint = (None,None)
-        self._label.mipmap = True
+        # A core label renders text without a widget (or a window)
+        self._label = CoreLabel(mipmap=True,**sanitized)
+        self._fsize = self._label.options['font_size']
         
         self.linewidth = keywords['linewidth'] if 'linewidth' in keywords else 0.0
         self.halign = keywords['halign'] if 'halign' in keywords else 'center'
@@ -622,9 +675,8 @@ class GLabel(GRectangle):
         GObject.__init__(self,**keywords)
         if not 'linecolor' in keywords:
             self.linecolor = (0,0,0,1)
-        self._reset()
+        self._resize()
         self._defined = True
-        self._label.bind(texture_size=self._callback)
     
     def __str__(self):
         """
@@ -639,52 +691,62 @@ class GLabel(GRectangle):
                 % (s,repr(self.text),repr(self.x),repr(self.y),repr(self.angle))
     
     # HIDDEN METHODS
-    def _callback(self,instance=None,value=None):
-        """
-        A workaround to deal with parameter requirements for callbacks
+    def _resize(self):
         """
-        if self._defined:
-            self._reset()
-    
-    def _reset(self):
-        """
-        Resets the drawing cache.
+        Renders the text, and grows the label to fit it.
+        
+        Identical labels share a texture, so this is cheap if the text was rendered
+        before.  The anchored edges (see ``left``, ``top`` and so on) stay in place.
         """
-        # Set up the label at the center.
-        self._label.size = self._label.texture_size
-        self._label.center = (0,0)
         if self.linecolor:
-            self._label.color = self.linecolor
+            self._label.options['color'] = self.linecolor
+        options = self._label.options
+        self._texture = GameApp.load_text(self._label.text,options['font_name'],
+                                          options['font_size'],options['bold'],
+                                          options['color'],options['halign'])
+        tw, th = self._texture.size if self._texture else (0,0)
         
         # Resize the outside if necessary
-        self._defined = False
-        self.width  = max(self.width, self._label.width)
-        self.height = max(self.height,self._label.height)
-        self._defined = True
+        self.width  = max(self.width, tw)
+        self.height = max(self.height,th)
         
         # Reset the absolute anchor
         if self._hanchor == 'left':
-            self._trans.x = self._ha+self.width/2.0
+            self._x = self._ha+self.width/2.0
         elif self._hanchor == 'right':
-            self._trans.x = self._ha-self.width/2.0
+            self._x = self._ha-self.width/2.0
         
         # Reset the absolute anchor
         if self._vanchor == 'top':
-            self._trans.y = self._hv-self.height/2.0
+            self._y = self._hv-self.height/2.0
         elif self._vanchor == 'bottom':
-            self._trans.y = self._hv+self.height/2.0
+            self._y = self._hv+self.height/2.0
+        self._mtrue = False
+        self._moved = True
+        self._stale = True
+        self._invalidate()
+    
+    def _reset(self):
+        """
+        Resets the drawing cache.
+        """
+        # Render the text FIRST, in case the color changed
+        self._resize()
+        tw, th = self._texture.size if self._texture else (0,0)
         
         # Reset the label anchor.
+        tx = -tw/2.0
         if self.halign == 'left':
-            self._label.x = -self.width/2.0
+            tx = -self.width/2.0
         elif self.halign == 'right':
-            self._label.right = self.width/2.0
+            tx = self.width/2.0-tw
         
         # Reset the label anchor.
+        ty = -th/2.0
         if self.valign == 'top':
-            self._label.top = self.height/2.0
+            ty = self.height/2.0-th
         elif self.valign == 'bottom':
-            self._label.bottom = -self.height/2.0
+            ty = -self.height/2.0
         
         GObject._reset(self)
         x = -self.width/2.0
@@ -692,14 +754,16 @@ class GLabel(GRectangle):
         
         if self.fillcolor:
             fill = Rectangle(pos=(x,y), size=(self.width,self.height))
-            self._cache.add(self._fillcolor)
+            self._cache.add(self.color_instruction(self._fillcolor))
             self._cache.add(fill)
         
-        self._cache.add(self._label.canvas)
+        if self._texture:
+            self._cache.add(self.color_instruction((1.0,1.0,1.0,1.0)))
+            self._cache.add(Rectangle(pos=(tx,ty), size=(tw,th), texture=self._texture))
         
         if self._linewidth > 0:
             line = Line(rectangle=(x,y,self.width,self.height),joint='miter',close=True,width=self.linewidth)
-            self._cache.add(self._linecolor)
+            self._cache.add(self.color_instruction(self._linecolor))
             self._cache.add(line)
         
         self._cache.add(PopMatrix())
@@ -33,7 +33,11 @@ class GSprite(GRectangle):
     
     If the image supports transparency, then this object can be used to represent irregular 
     shapes.  However, the :meth:`contains` method still treats this shape as a  rectangle.
+    
+    The frames are shared by every sprite with the same image and format (see 
+    :meth:`GameApp.load_frames`), and changing the frame only swaps the texture drawn.
     """
+    __slots__ = ('_source','_format','_frame','_images','_bounds','_texture')
     
     # MUTABLE PROPERTIES
     @property
@@ -50,7 +54,7 @@ class GSprite(GRectangle):
         assert value is None or GameApp.is_image(value), '%s is not an image file' % repr(value)
         self._source = value
         if self._defined:
-            self._reset()
+            self._resize()
     
     @property
     def count(self):
@@ -84,6 +88,8 @@ class GSprite(GRectangle):
         
         if self.frame >= count:
             self.frame = 0
+        if self._defined:
+            self._resize()
     
     @property
     def frame(self):
@@ -99,9 +105,10 @@ class GSprite(GRectangle):
         assert type(value) == int, '%s is not an int' % repr(value)
         assert value >= 0 and value < self.count, '%s is out of range' % repr(value)
         self._frame = value
-        if self._bounds:
+        if self._defined:
             self._texture = self._images[self._frame]
-            self._bounds.texture = self._texture
+            if self._bounds:
+                self._bounds.texture = self._texture
     
     
     # BUILT-IN METHODS
@@ -127,10 +134,11 @@ class GSprite(GRectangle):
         self._frame  = 0
         self.source = keywords['source'] if 'source' in keywords else None
         self.format = keywords['format'] if 'format' in keywords else (1,1)
-        self._images = [None]*self.count
+        self._images = (None,)*self.count
         self._bounds = None
         self._texture = None
         GRectangle.__init__(self,**keywords)
+        self._resize()
         self._defined = True
     
     # HIDDEN METHODS
@@ -146,31 +154,28 @@ class GSprite(GRectangle):
         assert value[0] > 0 and value[1] > 0, '%s does not have valid values' % repr(value)
         self._format = value
     
-    def _reset(self):
+    def _resize(self):
         """
-        Resets the drawing cache.
+        Loads the frames, and sizes the sprite to fit one unless the size was given.
         """
-        # Texture must load FIRST
-        texture = GameApp.load_texture(self.source)
-        if texture:
-            width  = texture.width/self._format[1]
-            height = texture.height/self._format[0]
-            
-            ty = 0
-            for row in range(self._format[0]):
-                tx = 0
-                for col in range(self._format[1]):
-                    self._images[row*self._format[1]+col] = texture.get_region(int(tx),texture.height-int(ty)-int(height),int(width),int(height))
-                    tx += width
-                ty += height
+        frames = GameApp.load_frames(self.source,self._format)
+        if frames:
+            self._images = frames
             if not self._set_width:
-                self.width = width
+                self.width = frames[0].width
             if not self._set_height:
-                self.height = height
+                self.height = frames[0].height
         else:
             print('Failed to load',repr(self.source))
-        
-        # THEN we can reset
+        self._texture = self._images[self._frame]
+        self._bounds = None
+        self._stale = True
+        self._touch()
+    
+    def _reset(self):
+        """
+        Resets the drawing cache.
+        """
         GObject._reset(self)
         x = -self.width/2.0
         y = -self.height/2.0
@@ -178,14 +183,14 @@ class GSprite(GRectangle):
         self._texture = self._images[self._frame]
         self._bounds = Rectangle(pos=(x,y), size=(self.width, self.height),texture=self._texture)
         if not self._fillcolor is None:
-            self._cache.add(self._fillcolor)
+            self._cache.add(self.color_instruction(self._fillcolor))
         else:
-            self._cache.add(Color(1,1,1))
+            self._cache.add(self.color_instruction((1.0,1.0,1.0,1.0)))
         self._cache.add(self._bounds)
         
         if not self._linecolor is None and self.linewidth > 0:
             line = Line(rectangle=(x,y,self.width,self.height),joint='miter',close=True,width=self.linewidth)
-            self._cache.add(self._linecolor)
+            self._cache.add(self.color_instruction(self._linecolor))
             self._cache.add(line)
         
         self._cache.add(PopMatrix())
@@ -12,6 +12,7 @@ from kivy.graphics import *
 from kivy.graphics.instructions import *
 from .grectangle import GRectangle, GObject
 from .app import GameApp
+import numpy as np
 
 
 class GTile(GObject):
@@ -23,7 +24,19 @@ class GTile(GObject):
     **explicitly** with the ``scale`` attribute).  Instead it repeats the image
     to fill in all of the remaining space.  This is ideal for terrain and other
     background features
+    
+    The mesh for the repeated image is built with NumPy in one pass, and is shared by
+    every tile with the same source, width and height.  Large tiles are split into
+    several meshes, as mesh indices are 16 bit.
     """
+    __slots__ = ('_source','_texture')
+    # Class attribute for the vertices and indices of tile meshes, by (source,width,height),
+    # from the least to the most recently used
+    MESH_CACHE = {}
+    # The most tile meshes to keep in MESH_CACHE
+    MESH_CACHE_SIZE = 64
+    # The most quads in a single mesh (mesh indices are 16 bit)
+    MESH_QUADS = 65536//4
     
     # MUTABLE PROPERTIES
     @property
@@ -39,8 +52,10 @@ class GTile(GObject):
     def source(self,value):
         assert value is None or GameApp.is_image(value), '%s is not an image file' % repr(value)
         self._source = value
-        if self._defined:
-            self._reset()
+        # A repeating texture cannot be an atlas region
+        self._texture = None if value is None else GameApp.load_texture(value,atlas=False)
+        self._stale = True
+        self._touch()
     
     # IMMUTABLE PROPERTIES
     @property
@@ -89,8 +104,7 @@ class GTile(GObject):
             raise ValueError("The 'width' argument must be specified.")
         if not 'height' in keywords:
             raise ValueError("The 'height' argument must be specified.")
-        self._texture = None
-        GRectangle.__init__(self,**keywords)
+        GObject.__init__(self,**keywords)
         self._defined = True
     
     # HIDDEN METHODS
@@ -99,44 +113,68 @@ class GTile(GObject):
         Resets the drawing cache.
         """
         GObject._reset(self)
-        x = -self._width/2.0
-        y = -self._height/2.0
-        
-        self._texture = GameApp.load_texture(self.source)
-        if not self._texture is None and self.width == 0:
+        if not self._texture is None and self._width == 0:
             self.width  = self._texture.width
-        if not self._texture is None and self.height == 0:
+        if not self._texture is None and self._height == 0:
             self.height = self._texture.height
+        if not self._fillcolor is None:
+            self._cache.add(self.color_instruction(self._fillcolor))
+        else:
+            self._cache.add(self.color_instruction((1.0,1.0,1.0,1.0)))
+        for vert, indx in self._build_mesh():
+            self._cache.add(Mesh(vertices=vert, indices=indx,mode='triangles',texture=self._texture))
+        
+        self._cache.add(PopMatrix())
+    
+    def _build_mesh(self):
+        """
+        Returns the vertices and indices of the tile meshes, building them if necessary.
+        
+        The image is repeated in a grid of quads from the bottom left corner, with the
+        quads on the top and right edges cut short to fit.  The result is a list of
+        (vertices, indices) pairs, one for every MESH_QUADS quads.  It is cached in
+        MESH_CACHE, so identical tiles share the same arrays.  Only the MESH_CACHE_SIZE
+        most recently used meshes are kept.
+        """
+        key = (self.source,self.width,self.height)
+        if key in self.MESH_CACHE:
+            result = self.MESH_CACHE.pop(key)
+            self.MESH_CACHE[key] = result
+            return result
         
         grid_x = self._texture.width
         grid_y = self._texture.height
-        size_x = int(self.width//grid_x)
-        size_y = int(self.height//grid_y)
-        rem_x = self.width-grid_x*size_x
-        rem_y = self.height-grid_y*size_y
+        rng_x = int(np.ceil(self.width/grid_x))
+        rng_y = int(np.ceil(self.height/grid_y))
         
-        rng_x = size_x+1 if rem_x > 0 else size_x
-        rng_y = size_y+1 if rem_y > 0 else size_y
+        # Quads are ordered column by column, as (ii,jj) in the grid
+        ii, jj = np.meshgrid(np.arange(rng_x),np.arange(rng_y),indexing='ij')
+        ii = ii.ravel()
+        jj = jj.ravel()
+        ni = np.minimum(self.width/grid_x-ii,1)
+        nj = np.minimum(self.height/grid_y-jj,1)
         
-        vert = []
-        indx = []
-        pos = 0
-        for ii in range(rng_x):
-            for jj in range(rng_y):
-                ni = 1 if ii < size_x else rem_x/grid_x
-                nj = 1 if jj < size_y else rem_y/grid_y
-                vert.extend([x+ii*grid_x,      y+jj*grid_y,         0, 1])
-                vert.extend([x+(ii+ni)*grid_x, y+jj*grid_y,        ni, 1])
-                vert.extend([x+(ii+ni)*grid_x, y+(jj+nj)*grid_y,   ni, 1-nj])
-                vert.extend([x+ii*grid_x,      y+(jj+nj)*grid_y,    0, 1-nj])
-                indx.extend([pos,pos+1,pos+2,pos+2,pos+3,pos])
-                pos += 4
+        x = -self.width/2.0
+        y = -self.height/2.0
+        vert = np.empty((len(ii),4,4),dtype=np.float32)
+        vert[:,0,0] = vert[:,3,0] = x+ii*grid_x
+        vert[:,1,0] = vert[:,2,0] = x+(ii+ni)*grid_x
+        vert[:,0,1] = vert[:,1,1] = y+jj*grid_y
+        vert[:,2,1] = vert[:,3,1] = y+(jj+nj)*grid_y
+        vert[:,0,2] = vert[:,3,2] = 0
+        vert[:,1,2] = vert[:,2,2] = ni
+        vert[:,0,3] = vert[:,1,3] = 1
+        vert[:,2,3] = vert[:,3,3] = 1-nj
         
-        mesh = Mesh(vertices=vert, indices=indx,mode='triangles',texture=self._texture)
-        if not self._fillcolor is None:
-            self._cache.add(self._fillcolor)
-        else:
-            self._cache.add(Color(1,1,1))
-        self._cache.add(mesh)
+        # Every mesh starts its indices at 0, so they share one index array
+        base = np.arange(0,4*min(len(ii),self.MESH_QUADS),4,dtype=np.uint16)[:,None]
+        indx = (base+np.array([0,1,2,2,3,0],dtype=np.uint16)).reshape(-1)
         
-        self._cache.add(PopMatrix())
\ No newline at end of file
+        result = []
+        for start in range(0,len(ii),self.MESH_QUADS):
+            chunk = vert[start:start+self.MESH_QUADS]
+            result.append((chunk.reshape(-1),indx[:6*len(chunk)]))
+        if len(self.MESH_CACHE) >= self.MESH_CACHE_SIZE:
+            del self.MESH_CACHE[next(iter(self.MESH_CACHE))]
+        self.MESH_CACHE[key] = result
+        return result
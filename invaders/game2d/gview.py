@@ -8,6 +8,8 @@ read the documentation on how to use the provided objects.
 Author: Walker M. White (wmw2)
 Date:   August 1, 2017 (Python 3 version)
 """
+import bisect
+
 # Basic Kivy Modules
 from kivy.graphics import *
 from kivy.graphics.instructions import *
@@ -15,6 +17,7 @@ from kivy.uix.floatlayout import FloatLayout
 from kivy.metrics import dp
 
 from introcs.geom import Point2
+from .gobject import is_num_tuple
 
 
 class GInput(object):
@@ -467,11 +470,121 @@ class GView(FloatLayout):
     :class:`GObject` instances to the :meth:`draw` method.  You must do this every
     animation frame, as the game is constantly clearing the window.
 
+    Objects that stay on screen for a while can instead be added to the view once with
+    :meth:`add`.  They stay in the window, and need not be drawn each frame, until they
+    are taken out with :meth:`remove`.  When an added object changes, it tells the
+    view.  At the end of the frame, the view only brings up to date the objects that
+    changed, so a frame where nothing changed does not touch the window at all.  Added
+    objects are drawn in layer order, and in the order they were added within a layer.
+    They are drawn below the objects drawn each frame.
+
+    Objects that lie completely outside of the attribute ``viewport`` are not drawn at
+    all (they are culled).  The attributes ``draw_count`` and ``cull_count`` count the
+    objects drawn and culled.
+
+    If the attribute ``sorting`` is True, the view holds on to the commands until the
+    end of the frame.  It then draws the layers in order (see the attribute ``layer``
+    of :class:`GObject`).  Within a layer, each command is moved back to follow the
+    last command with the same texture and color, so that OpenGL switches textures and
+    colors less often.  A command is never moved past one that it overlaps, so the
+    picture is the same as drawing the commands in the order given.  The objects added
+    to the view are grouped the same way, when they are shown or change.
+
     **You should never construct an object of this class**.  Creating a new instance
     of this class will not properly display it on the screen.  Instead, you should
     only use the one provided in the `view` attribute of :class:`GameApp`.
     See the documentation of that class for more information.
     """
+    # The most runs of commands that sorting may move a command back past
+    SORT_WINDOW = 32
+
+    # MUTABLE PROPERTIES
+    @property
+    def sorting(self):
+        """
+        Whether the view sorts its drawing commands to reduce OpenGL state changes.
+
+        Changing this value clears the commands drawn this frame, and places the objects
+        added to the view again.
+
+        **Invariant**: Must be a ``bool``.
+        """
+        return self._sorting
+
+    @sorting.setter
+    def sorting(self,value):
+        assert type(value) == bool, '%s is not a bool' % repr(value)
+        self._sorting = value
+        self.clear()
+        self._restack()
+
+    @property
+    def viewport(self):
+        """
+        The visible area of the view, or ``None`` to draw every object.
+
+        The value is a tuple ``(left, bottom, right, top)``.  :class:`GameApp` sets it
+        to the window, from (0,0) to the game width and height.
+
+        **Invariant**: Must be ``None`` or a tuple of four numbers.
+        """
+        return self._viewport
+
+    @viewport.setter
+    def viewport(self,value):
+        assert value is None or is_num_tuple(value,4), '%s is not a valid viewport' % repr(value)
+        self._viewport = None if value is None else tuple(value)
+
+
+    # IMMUTABLE PROPERTIES
+    @property
+    def draw_count(self):
+        """
+        The number of commands drawn since the view was last cleared.
+
+        This includes the objects added to the view that are in the window.
+
+        **Invariant**: Must be an int >= 0.
+        """
+        return self._drawn+len(self._kept.children)
+
+    @property
+    def cull_count(self):
+        """
+        The number of objects culled since the view was last cleared.
+
+        An object is culled if its bounds lie completely outside of the viewport.  This
+        includes the objects added to the view that are not in the window.
+
+        **Invariant**: Must be an int >= 0.
+        """
+        return self._culled+len(self._objects)-len(self._kept.children)
+
+    @property
+    def state_changes(self):
+        """
+        The number of texture and color changes in the last frame drawn.
+
+        This counts the changes between the objects added to the view, and between the
+        commands drawn this frame if the view sorts them.
+
+        **Invariant**: Must be an int >= 0.
+        """
+        return self._changes+self._kept_changes
+
+    @property
+    def state_saved(self):
+        """
+        The number of texture and color changes that sorting saved in the last frame.
+
+        This is the number of changes had the commands (and the objects added to the
+        view) been drawn in the order given, minus the attribute ``state_changes``.  The
+        commands are only reordered; each one still sets its own texture and color.
+
+        **Invariant**: Must be an int >= 0.
+        """
+        return self._saved+self._kept_given-self._kept_changes
+
 
     # BUILT-IN METHODS
     def __init__(self):
@@ -484,39 +597,402 @@ class GView(FloatLayout):
         :class:`GameApp`. See the documentation of that class for more information.
         """
         FloatLayout.__init__(self)
-        self._frame = InstructionGroup()
+        self._init_state()
         self.bind(pos=self._reset)
         self.bind(size=self._reset)
         self._reset()
-        self._contents = set()
 
 
     # PUBLIC METHODS
-    def draw(self,cmd):
+    def draw(self,cmd,bounds=None,layer=0,state=None):
         """
         Draws the given Kivy graphics command to this view.
 
         You should never call this method, since you do not understand raw Kivy graphics
         commands.  Instead, you should use the `draw` method in :class:`GObject` instead.
 
+        If ``bounds`` lies completely outside of the viewport, the command is culled
+        instead of drawn.
+
         :param cmd: the command to draw
         :type cmd:  A Kivy graphics command
+
+        :param bounds: the box (left, bottom, right, top) covered by the command
+        :type bounds:  ``None`` (always draw) or a tuple of four numbers
+
+        :param layer: the layer to draw the command in (when sorting)
+        :type layer:  ``int``
+
+        :param state: the OpenGL state (texture, color) set by the command
+        :type state:  ``None`` (unknown) or a pair of hashable values
+
+        When sorting, a command with unknown bounds is never reordered past another,
+        and a command with an unknown state is never moved.
         """
-        if not cmd in self._contents:
+        if self._culls(bounds):
+            self._culled += 1
+            return
+        self._drawn += 1
+        if self._sorting:
+            self._queue.append((layer,state,cmd,bounds))
+        else:
             self._frame.add(cmd)
-            self._contents.add(cmd)
+
+    def add(self,obj):
+        """
+        Adds the given object to this view, until it is removed.
+
+        The object stays in the window from one frame to the next, so it should not also
+        be drawn with :meth:`draw`.  Changes to the object show up at the end of the
+        frame.  Adding an object that is already in the view does nothing.
+
+        :param obj: the object to add
+        :type obj:  :class:`GObject` not in a scene or another view
+        """
+        if obj._view is self:
+            return
+        assert obj._view is None and obj._parent is None, '%s is already shown' % repr(obj)
+        obj._view = self
+        self._objects[obj] = [None,obj.layer,self._added,None]
+        self._added += 1
+        self._touched.add(obj)
+
+    def remove(self,obj):
+        """
+        Removes the given object from this view.
+
+        Removing an object that is not in the view does nothing.
+
+        :param obj: the object to remove
+        :type obj:  :class:`GObject`
+        """
+        if not obj._view is self:
+            return
+        cmd = self._objects[obj][0]
+        if not cmd is None:
+            self._take(obj)
+            self._kept.remove(cmd)
+        del self._objects[obj]
+        self._touched.discard(obj)
+        obj._view = None
 
     def clear(self):
         """
         Clears the contents of the view.
 
         This method is called for you automatically at the start of the animation
-        frame.  That way, you are not drawing images on top of one another.
+        frame.  That way, you are not drawing images on top of one another.  The objects
+        added to the view are not affected.
         """
+        self._drawn = 0
+        self._culled = 0
+        self._queue = []
         self._frame.clear()
-        self._contents.clear()
 
     # HIDDEN METHODS
+    def _init_state(self):
+        """
+        Initializes the drawing state of this view.
+
+        This is everything but the Kivy widget, so that views without a window (see
+        :class:`GHeadlessView`) can share it.
+        """
+        self._frame = InstructionGroup()
+        self._kept = InstructionGroup()
+        self._objects = {}
+        self._order = []
+        self._given = []
+        self._added = 0
+        self._touched = set()
+        self._viewport = None
+        self._changes = 0
+        self._saved = 0
+        self._kept_changes = 0
+        self._kept_given = 0
+        self.sorting = False
+
+    def _culls(self,bounds):
+        """
+        Returns True if the given bounds lie completely outside of the viewport.
+
+        :param bounds: the box (left, bottom, right, top) to check
+        :type bounds:  ``None`` (never culled) or a tuple of four numbers
+        """
+        if bounds is None or self._viewport is None:
+            return False
+        left, bottom, right, top = self._viewport
+        return bounds[2] < left or bounds[0] > right or bounds[3] < bottom or bounds[1] > top
+
+    def _overlaps(self,box,bounds):
+        """
+        Returns True if the given boxes may overlap, so their drawing order matters.
+
+        :param box: the first box (left, bottom, right, top)
+        :type box:  ``None`` (unknown) or a sequence of four numbers
+
+        :param bounds: the second box (left, bottom, right, top)
+        :type bounds:  ``None`` (unknown) or a sequence of four numbers
+        """
+        if box is None or bounds is None:
+            return True
+        return not (box[2] < bounds[0] or box[0] > bounds[2] or box[3] < bounds[1] or box[1] > bounds[3])
+
+    def _commit(self):
+        """
+        Brings the window up to date with the commands drawn this frame.
+
+        This method is called for you automatically at the end of the animation
+        frame.  If the view is sorting, this is when the sorted commands are added to
+        the frame.  Only the added objects that changed this frame are looked at.
+        """
+        if self._sorting:
+            self._submit()
+        touched = self._touched
+        self._touched = set()
+        for obj in touched:
+            self._update(obj)
+
+    def _update(self,obj):
+        """
+        Brings the given added object up to date, showing or hiding it as needed.
+
+        The drawing cache of the object keeps its identity when rebuilt, so the window
+        only changes when the object moves in or out of the viewport, or to another
+        place in the drawing order (see :meth:`_slot`).
+
+        :param obj: the object to update
+        :type obj:  :class:`GObject` added to this view
+        """
+        obj._prepare()
+        entry = self._objects[obj]
+        index = None if entry[0] is None else self._take(obj)
+        entry[1] = obj.layer
+        entry[3] = obj._draw_state()
+        shown = not self._culls(obj.bounds)
+        if shown:
+            slot, fits = self._slot(obj,index)
+        if not entry[0] is None and (not shown or slot != index):
+            self._kept.remove(entry[0])
+            entry[0] = None
+        if shown:
+            self._put(obj,slot)
+            if not fits:
+                self._restack(entry[1])
+
+    def _slot(self,obj,prefer):
+        """
+        Returns the index in the window at which to show the given added object.
+
+        The value is a pair (index, fits).  The object must be drawn above the objects
+        in its layer that were added before it and that it overlaps, and below those
+        added after it that it overlaps (without sorting, it is drawn in the order
+        added).  Within these limits it goes next to an object with the same texture
+        and color if it can, and otherwise stays at the preferred index.  If there is
+        no index within the limits (as objects moved since they were placed), ``fits``
+        is False, and the layer must be placed again.
+
+        :param obj: the object to place, which is not in the drawing order
+        :type obj:  :class:`GObject` added to this view
+
+        :param prefer: the index of the object before it changed
+        :type prefer:  ``None`` or an ``int`` >= 0
+        """
+        entry = self._objects[obj]
+        layer, rank, state = entry[1], entry[2], entry[3]
+        bounds = obj.bounds
+        low = 0
+        high = None
+        end = len(self._order)
+        for k in range(len(self._order)):
+            other = self._objects[self._order[k]]
+            if other[1] < layer:
+                low = k+1
+            elif other[1] > layer:
+                end = k
+                break
+            elif self._sorting and not self._overlaps(self._order[k].bounds,bounds):
+                continue
+            elif other[2] < rank:
+                low = k+1
+            elif high is None:
+                high = k
+        if high is None:
+            high = end
+        if low > high:
+            return (high,False)
+        if not self._sorting or state is None:
+            return (low if prefer is None or not low <= prefer <= high else prefer,True)
+
+        def grouped(index):
+            return ((index > 0 and self._objects[self._order[index-1]][3] == state) or
+                    (index < len(self._order) and self._objects[self._order[index]][3] == state))
+
+        if not prefer is None and low <= prefer <= high and grouped(prefer):
+            return (prefer,True)
+        for index in range(high,low-1,-1):
+            if grouped(index):
+                return (index,True)
+        return (high if prefer is None or not low <= prefer <= high else prefer,True)
+
+    def _put(self,obj,index):
+        """
+        Puts the given added object at the index in the drawing order.
+
+        The object is added to the window as well, if it is not there already.
+
+        :param obj: the object to put
+        :type obj:  :class:`GObject` added to this view, not in the drawing order
+
+        :param index: the place in the drawing order
+        :type index:  ``int`` >= 0
+        """
+        entry = self._objects[obj]
+        self._kept_changes += self._between(self._order,index,entry[3])
+        self._order.insert(index,obj)
+        given = (entry[1],entry[2],obj)
+        spot = bisect.bisect(self._given,given)
+        self._kept_given += self._between(self._given,spot,entry[3])
+        self._given.insert(spot,given)
+        if entry[0] is None:
+            self._kept.insert(index,obj._cache)
+            entry[0] = obj._cache
+
+    def _take(self,obj):
+        """
+        Returns the index of the given added object, taking it out of the drawing order.
+
+        The object is not taken out of the window.
+
+        :param obj: the object to take out
+        :type obj:  :class:`GObject` in the drawing order
+        """
+        entry = self._objects[obj]
+        index = self._order.index(obj)
+        del self._order[index]
+        self._kept_changes -= self._between(self._order,index,entry[3])
+        spot = bisect.bisect_left(self._given,(entry[1],entry[2]))
+        del self._given[spot]
+        self._kept_given -= self._between(self._given,spot,entry[3])
+        return index
+
+    def _restack(self,layer=None):
+        """
+        Places the added objects of the given layer again, in the order they were added.
+
+        :param layer: the layer to place again
+        :type layer:  ``int``, or ``None`` for every layer
+        """
+        objs = [obj for obj in self._order if layer is None or self._objects[obj][1] == layer]
+        for obj in objs:
+            self._take(obj)
+            self._kept.remove(self._objects[obj][0])
+            self._objects[obj][0] = None
+        objs.sort(key=lambda obj: self._objects[obj][2])
+        for obj in objs:
+            self._put(obj,self._slot(obj,None)[0])
+
+    def _between(self,objs,index,state):
+        """
+        Returns the texture and color changes added by drawing a state at the index.
+
+        The objects are those drawn without the state, and the state goes in front of
+        the one at the index.  The value is the number of changes with the state minus
+        the number without it (see :meth:`_count_changes`).
+
+        :param objs: the added objects (or entries ending in one), in drawing order
+        :type objs:  ``list``
+
+        :param index: the position of the state
+        :type index:  ``int`` >= 0
+
+        :param state: the OpenGL state (texture, color)
+        :type state:  ``None`` (unknown) or a pair of hashable values
+        """
+        around = [self._objects[obj[-1] if isinstance(obj,tuple) else obj][3]
+                  for obj in objs[max(index-1,0):index+1]]
+        split = 1 if index > 0 else 0
+        return self._count_changes(around[:split]+[state]+around[split:])-self._count_changes(around)
+
+    def _submit(self):
+        """
+        Reorders the commands drawn this frame and passes them on to the frame.
+
+        The layers are drawn in order.  Within a layer, the commands are grouped in runs
+        sharing a state (see :meth:`_place`).
+        """
+        queue = self._queue
+        self._queue = []
+
+        layers = {}
+        for (layer,state,cmd,bounds) in queue:
+            self._place(layers.setdefault(layer,[]),state,cmd,bounds)
+
+        states = []
+        for layer in sorted(layers):
+            for (state,box,cmds) in layers[layer]:
+                for cmd in cmds:
+                    self._frame.add(cmd)
+                states.extend([state]*len(cmds))
+
+        self._changes = self._count_changes(states)
+        self._saved = self._count_changes([item[1] for item in queue])-self._changes
+
+    def _place(self,runs,state,cmd,bounds):
+        """
+        Adds a command to the end of the last run with the same state, if allowed.
+
+        Each run is a list [state, box, commands], where box encloses the bounds of
+        the commands (``None`` if any bounds are unknown).  The command may only join
+        an earlier run if it overlaps none of the runs after it, and if there are at
+        most SORT_WINDOW of them.  Otherwise, it starts a new run at the end.  A command
+        with an unknown state always starts a new run.
+
+        :param runs: the runs of commands in a layer so far
+        :type runs:  ``list``
+
+        :param state: the OpenGL state (texture, color) set by the command
+        :type state:  ``None`` (unknown) or a pair of hashable values
+
+        :param cmd: the command to add
+        :type cmd:  A Kivy graphics command
+
+        :param bounds: the box (left, bottom, right, top) covered by the command
+        :type bounds:  ``None`` (unknown) or a tuple of four numbers
+        """
+        if not state is None:
+            for run in reversed(runs[-self.SORT_WINDOW:]):
+                box = run[1]
+                if run[0] == state:
+                    run[2].append(cmd)
+                    if box is None or bounds is None:
+                        run[1] = None
+                    else:
+                        run[1] = [min(box[0],bounds[0]),min(box[1],bounds[1]),
+                                  max(box[2],bounds[2]),max(box[3],bounds[3])]
+                    return
+                if self._overlaps(box,bounds):
+                    break
+        runs.append([state,None if bounds is None else list(bounds),[cmd]])
+
+    def _count_changes(self,states):
+        """
+        Returns the number of texture and color changes needed to draw the states in order.
+
+        An unknown state counts as changing both.
+
+        :param states: the states of the commands, in drawing order
+        :type states:  ``list`` of ``None`` or (texture, color) pairs
+        """
+        changes = 0
+        last = None
+        for state in states:
+            if state is None or last is None:
+                changes += 2
+            else:
+                changes += (state[0] != last[0])+(state[1] != last[1])
+            last = state
+        return changes
+
     def _reset(self,obj=None,value=None):
         """
         Resets the view canvas in response to a resizing event
@@ -526,4 +1002,5 @@ class GView(FloatLayout):
         self.canvas.add(Rectangle(pos=self.pos,size=self.size))
         # Work-around for Retina Macs
         self.canvas.add(Scale(dp(1),dp(1),dp(1)))
+        self.canvas.add(self._kept)
         self.canvas.add(self._frame)
@@ -0,0 +1,295 @@
+"""
+A driver to run games without a window.
+
+This module runs the ``start``, ``update`` and ``draw`` methods of a :class:`GameApp`
+subclass on a plain Python loop.  There is no window, no Kivy clock and no OpenGL
+context.  Kivy is switched to its mock OpenGL backend, so drawing commands are still
+built (and still cost time), but nothing is sent to a graphics card.  The loop steps
+as fast as the CPU allows, which makes it ideal for soak tests, balance runs and
+benchmarks on machines without a display.
+"""
+import os
+import time
+
+from kivy.graphics import *
+from kivy.graphics.instructions import *
+from introcs.geom import Point2
+
+from .gview import GInput, GView
+
+
+def init_headless():
+    """
+    Initializes Kivy graphics without an OpenGL context.
+
+    This selects the mock OpenGL backend, so that graphics instructions and textures
+    may be created without a window.  It does nothing if the graphics have already been
+    initialized (for example, because a window is open).
+    """
+    from kivy.graphics.cgl import cgl_init, cgl_get_initialized_backend_name
+    if cgl_get_initialized_backend_name() is None:
+        os.environ['KIVY_GL_BACKEND'] = 'mock'
+        cgl_init()
+
+
+# #mark -
+class GHeadlessInput(GInput):
+    """
+    A class representing a scriptable input handler.
+
+    This input handler is not hooked up to a keyboard or mouse.  Instead, keys and
+    touches are pressed and released with the methods of this class.  Each press and
+    release is seen by the game in the next animation frame, exactly as if it had come
+    from the keyboard or mouse.
+    """
+
+    # IMMUTABLE ATTRIBUTES
+    @property
+    def touch(self):
+        """
+        The current (x,y) coordinate of the mouse, if pressed.
+
+        **Immutable**: This value cannot be altered.
+
+        **Invariant**: Must be either a :class:`Point2` or None (if there is no touch).
+        """
+        if self._touch is None:
+            return None
+
+        return Point2(self._touch.x,self._touch.y)
+
+
+    # PUBLIC METHODS
+    def press(self,key):
+        """
+        Presses (and holds down) the given key.
+
+        :param key: the key to press
+        :type key:  ``str``
+        """
+        assert type(key) == str, '%s is not a key name' % repr(key)
+        if self.keyboard_enabled:
+            self._capture_key(None,(0,key),key,[])
+
+    def release(self,key):
+        """
+        Releases the given key.
+
+        This method does nothing if the key is not held down.
+
+        :param key: the key to release
+        :type key:  ``str``
+        """
+        assert type(key) == str, '%s is not a key name' % repr(key)
+        if self.keyboard_enabled and self._keystate.get(key,False):
+            self._release_key(None,(0,key))
+
+    def release_all(self):
+        """
+        Releases all keys that are currently held down.
+        """
+        for key in self.keys:
+            self.release(key)
+
+    def touch_down(self,x,y):
+        """
+        Presses (or drags) the mouse at the given position.
+
+        :param x: the horizontal coordinate of the touch
+        :type x:  ``int`` or ``float``
+
+        :param y: the vertical coordinate of the touch
+        :type y:  ``int`` or ``float``
+        """
+        assert type(x) in [int,float], '%s is not a number' % repr(x)
+        assert type(y) in [int,float], '%s is not a number' % repr(y)
+        if self.touch_enabled:
+            self._capture_touch(None,Point2(x,y))
+
+    def touch_up(self):
+        """
+        Releases the mouse.
+        """
+        if self.touch_enabled:
+            self._release_touch(None,None)
+
+
+    # HIDDEN METHODS
+    def _enable_touch(self):
+        """
+        Enables touch events for this input handler (nothing to hook up)
+        """
+        pass
+
+    def _disable_touch(self):
+        """
+        Disables touch events for this input handler
+        """
+        self._touch = None
+
+    def _enable_keyboard(self):
+        """
+        Enables keyboard events for this input handler (nothing to hook up)
+        """
+        pass
+
+    def _disable_keyboard(self):
+        """
+        Disables keyboard events for this input handler
+        """
+        self._keystate = {}
+        self._keycount = 0
+
+
+# #mark -
+class GHeadlessView(GView):
+    """
+    A class representing a view that is not attached to a window.
+
+    This view builds its frame exactly like :class:`GView`, so drawing has the same
+    cost.  However, the frame is never attached to a canvas and so it is never
+    rendered.
+    """
+
+    # BUILT-IN METHODS
+    def __init__(self):
+        """
+        Creates a new view without a window.
+
+        Unlike :class:`GView`, this constructor does not initialize a Kivy widget, as
+        widgets require a window.
+        """
+        self._init_state()
+
+
+# #mark -
+class GHeadless(object):
+    """
+    A class to drive a :class:`GameApp` without a window.
+
+    To use this class, give it the :class:`GameApp` subclass to run, along with the
+    keyword arguments for that class.  For example::
+
+        driver = GHeadless(Invaders,width=800,height=700)
+        driver.input.press('s')
+        driver.run(10000)
+
+    Each frame uses a fixed time step of ``1/fps`` seconds, no matter how long the frame
+    actually took.  So the game plays the same however fast the loop runs.
+
+    The game is started when the driver is created.  Use the attribute ``input`` to
+    press and release keys between frames, or provide a ``script`` to :meth:`run`.
+    """
+
+    # IMMUTABLE ATTRIBUTES
+    @property
+    def game(self):
+        """
+        The game being driven.
+
+        **Invariant**: Must be an instance of :class:`GameApp`.
+        """
+        return self._game
+
+    @property
+    def view(self):
+        """
+        The (windowless) view of the game.
+
+        **Invariant**: Must be an instance of :class:`GHeadlessView`.
+        """
+        return self._game.view
+
+    @property
+    def input(self):
+        """
+        The scriptable input handler of the game.
+
+        **Invariant**: Must be an instance of :class:`GHeadlessInput`.
+        """
+        return self._game.input
+
+    @property
+    def frames(self):
+        """
+        The number of frames processed so far.
+
+        **Invariant**: Must be an int >= 0.
+        """
+        return self._frames
+
+    @property
+    def elapsed(self):
+        """
+        The wall-clock time (in seconds) spent processing frames so far.
+
+        **Invariant**: Must be a float >= 0.
+        """
+        return self._elapsed
+
+    @property
+    def rate(self):
+        """
+        The number of frames processed per second of wall-clock time.
+
+        **Invariant**: Must be a float >= 0.
+        """
+        if self._elapsed == 0:
+            return 0.0
+        return self._frames/self._elapsed
+
+
+    # BUILT-IN METHODS
+    def __init__(self,cls,**keywords):
+        """
+        Creates a driver and starts a new game.
+
+        :param cls: the game class to run
+        :type cls:  a subclass of :class:`GameApp`
+
+        :param keywords: dictionary of keyword arguments for the game
+        :type keywords:  keys are attribute names
+        """
+        from .app import GameApp
+        assert issubclass(cls,GameApp), '%s is not a game class' % repr(cls)
+        init_headless()
+
+        keywords['headless'] = True
+        self._game = cls(**keywords)
+        self._game._view  = GHeadlessView()
+        self._game._input = GHeadlessInput()
+        self._game._setviewport()
+        self._frames  = 0
+        self._elapsed = 0.0
+        self._game.start()
+
+
+    # PUBLIC METHODS
+    def step(self):
+        """
+        Processes a single animation frame.
+        """
+        start = time.perf_counter()
+        self._game._refresh(1.0/self._game.fps)
+        self._elapsed += time.perf_counter()-start
+        self._frames += 1
+
+    def run(self,frames,script=None):
+        """
+        Processes the given number of animation frames.
+
+        If ``script`` is not None, it is called before every frame with the frame number
+        and the input handler.  It can then press or release keys for that frame.  If
+        the script returns False, the driver stops early.
+
+        :param frames: the number of frames to process
+        :type frames:  ``int`` >= 0
+
+        :param script: the function to call before every frame
+        :type script:  ``callable`` or None
+        """
+        assert type(frames) == int and frames >= 0, '%s is not a valid frame count' % repr(frames)
+        for frame in range(frames):
+            if not script is None and script(self._frames,self.input) == False:
+                return
+            self.step()
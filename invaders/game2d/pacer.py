@@ -0,0 +1,120 @@
+"""
+A module to time animation frames.
+
+The Kivy clock calls the game once every period of its frame rate.  A pacer measures
+the time between these calls.  It also notices the frames that start late, which is a
+sign that the game cannot keep up with its frame rate.
+"""
+from kivy.logger import Logger
+import time
+
+
+class Pacer(object):
+    """
+    A class to time animation frames against a frame rate.
+
+    Call :meth:`tick` at the start of every frame.  It returns the time since the start
+    of the previous frame.  The deadline of a frame is one period (``1/fps`` seconds)
+    after the previous frame.
+
+    A frame that starts more than ``SLACK`` periods after its deadline has missed it.
+    The pacer counts these in the attribute ``missed``, and logs a warning every
+    ``REPORT`` seconds that any frames missed their deadlines.
+    """
+    # The fraction of a period that a frame may start late without missing its deadline
+    SLACK = 0.5
+    # The number of seconds between reports of missed deadlines
+    REPORT = 5.0
+
+    # IMMUTABLE PROPERTIES
+    @property
+    def frames(self):
+        """
+        The number of frames timed so far.
+
+        **Invariant**: Must be an int >= 0.
+        """
+        return self._frames
+
+    @property
+    def missed(self):
+        """
+        The number of frames that started after their deadline.
+
+        **Invariant**: Must be an int >= 0.
+        """
+        return self._missed
+
+
+    # BUILT-IN METHODS
+    def __init__(self):
+        """
+        Creates a new pacer.
+
+        The first call to :meth:`tick` starts the first period.
+        """
+        self._start = None
+        self._frames = 0
+        self._missed = 0
+        self._reported = None
+        self._window = (0,0)
+
+
+    # PUBLIC METHODS
+    def tick(self,fps):
+        """
+        Starts a new frame, returning the time since the start of the previous one.
+
+        The frame rate may change from one call to the next.  The deadline is always one
+        period of the current rate after the start of the previous frame.  The first
+        call (or the first after :meth:`reset`) returns 0.
+
+        :param fps: the frame rate to time against
+        :type fps:  ``int`` or ``float`` > 0
+
+        :return: the time in seconds since the start of the previous frame
+        :rtype:  ``float``
+        """
+        assert type(fps) in [int,float], '%s is not a number' % repr(fps)
+        assert fps > 0, '%s is not positive' % repr(fps)
+        now = time.perf_counter()
+        if self._start is None:
+            self._start = now
+            if self._reported is None:
+                self._reported = now
+            return 0.0
+
+        if now > self._start+(1.0+self.SLACK)/fps:
+            self._missed += 1
+        dt = now-self._start
+        self._start = now
+        self._frames += 1
+        self._report()
+        return dt
+
+    def reset(self):
+        """
+        Forgets the previous frame, so the next call to :meth:`tick` returns 0.
+
+        Use this when the frame rate changes, or after a long pause (such as a window
+        that was hidden), so that the old period is neither handed on as the time of the
+        next frame nor counted as a missed deadline.
+        """
+        self._start = None
+
+
+    # HIDDEN METHODS
+    def _report(self):
+        """
+        Logs the missed deadlines since the last report, if it is time to do so.
+        """
+        if self._start-self._reported < self.REPORT:
+            return
+
+        frames = self._frames-self._window[0]
+        missed = self._missed-self._window[1]
+        if missed:
+            Logger.warning('Pacer: %d of %d frames missed their deadline in the last %.1f seconds'
+                           % (missed,frames,self._start-self._reported))
+        self._reported = self._start
+        self._window = (self._frames,self._missed)
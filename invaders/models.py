@@ -9,8 +9,8 @@ Just because something is a model does not mean there has to be a special
 class for it. Unless you need something special for your extra gameplay
 features, Ship and Aliens could just be an instance of GImage that you move
 across the screen. You only need a new class when you add extra features to
-an object. So technically Bolt, which has a velocity, is really the only model
-that needs to have its own class.
+an object. The laser bolts, which have a velocity, are all kept together in
+a BoltPool, so that they can be moved at once.
 
 With that said, we have included the subclasses for Ship and Aliens. That is
 because there are a lot of constants in consts.py for initializing the
@@ -27,6 +27,8 @@ about whether to make a new class or not, please ask on Piazza.
 """
 from consts import *
 from game2d import *
+import numpy as np
+import math
 
 # PRIMARY RULE: Models are not allowed to access anything in any module other
 # than consts.py.  If you need extra information from Gameplay, then it should
@@ -59,6 +61,8 @@ class Ship(GImage):
     """
     #  IF YOU ADD ATTRIBUTES, LIST THEM BELOW
     # Attribute _ship: _ship is a Ship object
+    # (GImage uses slots, so new attributes must be added to __slots__)
+    __slots__ = ()
     # GETTERS AND SETTERS (ONLY ADD IF YOU NEED THEM)
     # INITIALIZER TO CREATE A NEW SHIP
     def __init__(self,x,y):
@@ -76,26 +80,21 @@ class Ship(GImage):
     # METHODS TO MOVE THE SHIP AND CHECK FOR COLLISIONS
 
     ####ADD MOVING THE SHIP LEFT OR RIGHT METHOD HERE FROM THE WAVE CLASS AND THEN JUST CALL IT THERE
-    def collides(self,bolt):
+    def collides_many(self,xs,ys):
         """
-        Returns True if the player bolt collides with this alien
+        Returns a numpy array of bools, True for each alien bolt hitting this ship
 
-        This method returns False if bolt was not fired by the player.
+        A bolt hits the ship if their rectangles overlap.  Rectangles that only
+        touch along an edge do not overlap, as in Formation.collides_many.
 
-        Parameter bolt: The laser bolt to check
-        Precondition: bolt is of class Bolt
-        """
-        if bolt.isPlayerBolt():
-            return False
+        Parameter xs: the x-coordinates of the bolts
+        Precondition: xs is a 1d numpy array of numbers
 
-        if self.contains((bolt.x-BOLT_WIDTH/2,bolt.y-BOLT_HEIGHT/2)):
-            return True
-        elif self.contains((bolt.x-BOLT_WIDTH/2,bolt.y+BOLT_HEIGHT/2)):
-            return True
-        elif self.contains((bolt.x+BOLT_WIDTH/2,bolt.y-BOLT_HEIGHT/2)):
-            return True
-        elif self.contains((bolt.x+BOLT_WIDTH/2,bolt.y+BOLT_HEIGHT/2)):
-            return True
+        Parameter ys: the y-coordinates of the bolts
+        Precondition: ys is a 1d numpy array of numbers, the same length as xs
+        """
+        return ((np.abs(xs-self.x) < (SHIP_WIDTH+BOLT_WIDTH)/2) &
+                (np.abs(ys-self.y) < (SHIP_HEIGHT+BOLT_HEIGHT)/2))
 
 
     # COROUTINE METHOD TO ANIMATE THE SHIP
@@ -122,6 +121,8 @@ class Alien(GImage):
     for extra gameplay features (like giving each alien a score value).
     """
     #  IF YOU ADD ATTRIBUTES, LIST THEM BELOW
+    # (GImage uses slots, so new attributes must be added to __slots__)
+    __slots__ = ()
 
     # GETTERS AND SETTERS (ONLY ADD IF YOU NEED THEM)
 
@@ -143,80 +144,660 @@ class Alien(GImage):
         height=ALIEN_HEIGHT,source=source)
 
     # METHOD TO CHECK FOR COLLISION (IF DESIRED)
-    def collides(self,bolt):
+    # (Formation.collides_many checks every alien in the wave at once)
+
+    # ADD MORE METHODS (PROPERLY SPECIFIED) AS NECESSARY
+
+
+# IF YOU NEED ADDITIONAL MODEL CLASSES, THEY GO HERE
+
+
+class Formation(object):
+    """
+    A class representing the grid of aliens in a wave.
+
+    The aliens in a wave always move together, so this class stores them as a
+    structure of arrays rather than as a 2d list of Alien objects. There is one
+    NumPy array for the x-coordinates of the aliens, one for the y-coordinates,
+    and a boolean mask recording which aliens are still alive. Row 0 is the
+    bottom row of the formation. Marching, bounds checks and collisions are
+    all vectorized operations on these arrays.
+
+    The formation is drawn with one GSpriteBatch per alien image, holding a
+    quad for every alien relative to the formation origin. Marching only
+    moves the batches, and a dead alien's quad is hidden, so the formation
+    is a handful of meshes however many aliens it has.
+
+    The formation also keeps the number of living aliens in every row and
+    column, the extreme living columns and the lowest living row. These are
+    only updated when an alien dies, so the bounds of the formation can be
+    read in constant time.
+    """
+    # HIDDEN ATTRIBUTES:
+    # Attribute _rows: the number of rows in the formation
+    # Invariant: _rows is an int > 0
+    #
+    # Attribute _cols: the number of aliens in each row
+    # Invariant: _cols is an int > 0
+    #
+    # Attribute _x: the x-coordinate of every alien (dead or alive)
+    # Invariant: _x is a (_rows,_cols) numpy array of floats
+    #
+    # Attribute _y: the y-coordinate of every alien (dead or alive)
+    # Invariant: _y is a (_rows,_cols) numpy array of floats
+    #
+    # Attribute _alive: which aliens are still alive
+    # Invariant: _alive is a (_rows,_cols) numpy array of bools
+    #
+    # Attribute _batches: the sprite batches used to draw the formation
+    # Invariant: _batches is a list of GSpriteBatch objects, one per image in use
+    #
+    # Attribute _quads: the batch and the first quad of every row
+    # Invariant: _quads is a list of _rows pairs (batch,start); the alien at
+    # (row,col) is quad start+col of batch
+    #
+    # Attribute _origin: the position of the alien in row 0, column 0
+    # Invariant: _origin is a list of two floats, equal to [_x[0,0],_y[0,0]]
+    #
+    # Attribute _count: the number of living aliens
+    # Invariant: _count is an int, equal to the number of True values in _alive
+    #
+    # Attribute _colcount: the number of living aliens in each column
+    # Invariant: _colcount is a numpy array of _cols ints >= 0
+    #
+    # Attribute _rowcount: the number of living aliens in each row
+    # Invariant: _rowcount is a numpy array of _rows ints >= 0
+    #
+    # Attribute _columns: the columns with a living alien, in no particular order
+    # Invariant: _columns is a list of the ints col with _colcount[col] > 0
+    #
+    # Attribute _colindex: the position of each live column in _columns
+    # Invariant: _colindex is a numpy array of _cols ints, with _columns[_colindex[col]] == col
+    # for every live column col (meaningless for dead columns)
+    #
+    # Attribute _lowest: the lowest row with a living alien in each column
+    # Invariant: _lowest is a numpy array of _cols ints 0.._rows-1 (meaningless for dead columns)
+    #
+    # Attribute _left: the leftmost column with a living alien
+    # Invariant: _left is an int 0.._cols-1 (meaningless if _count is 0)
+    #
+    # Attribute _right: the rightmost column with a living alien
+    # Invariant: _right is an int 0.._cols-1 (meaningless if _count is 0)
+    #
+    # Attribute _bottom: the lowest row with a living alien
+    # Invariant: _bottom is an int 0.._rows-1 (meaningless if _count is 0)
+
+    # GETTERS AND SETTERS
+    def getRows(self):
+        """
+        Returns the number of rows in the formation
         """
-        Returns True if the player bolt collides with this alien
+        return self._rows
 
-        This method returns False if bolt was not fired by the player.
+    def getCols(self):
+        """
+        Returns the number of aliens in each row of the formation
+        """
+        return self._cols
 
-        Parameter bolt: The laser bolt to check
-        Precondition: bolt is of class Bolt
+    def getPosition(self,row,col):
         """
-        #CHECK FOR ALL  CORNER corners
-        if not bolt.isPlayerBolt():
-            return False
+        Returns the (x,y) position of the alien at the given row and column
 
-        if self.contains((bolt.x-BOLT_WIDTH/2,bolt.y-BOLT_HEIGHT/2)):
-            return True
-        elif self.contains((bolt.x-BOLT_WIDTH/2,bolt.y+BOLT_HEIGHT/2)):
-            return True
-        elif self.contains((bolt.x+BOLT_WIDTH/2,bolt.y-BOLT_HEIGHT/2)):
-            return True
-        elif self.contains((bolt.x+BOLT_WIDTH/2,bolt.y+BOLT_HEIGHT/2)):
-            return True
+        Parameter row: the alien row
+        Precondition: row is an int in 0.._rows-1
 
-    # ADD MORE METHODS (PROPERLY SPECIFIED) AS NECESSARY
+        Parameter col: the alien column
+        Precondition: col is an int in 0.._cols-1
+        """
+        return (float(self._x[row,col]),float(self._y[row,col]))
+
+    def isAlive(self,row,col):
+        """
+        Returns True if the alien at the given row and column is alive
+
+        Parameter row: the alien row
+        Precondition: row is an int in 0.._rows-1
+
+        Parameter col: the alien column
+        Precondition: col is an int in 0.._cols-1
+        """
+        return bool(self._alive[row,col])
+
+    def isEmpty(self):
+        """
+        Returns True if every alien in the formation is dead
+        """
+        return self._count == 0
+
+    def getCount(self):
+        """
+        Returns the number of living aliens in the formation
+        """
+        return self._count
+
+    def getLeft(self):
+        """
+        Returns the x-coordinate of the leftmost living alien, or None if empty
+        """
+        if self.isEmpty():
+            return None
+        return self._origin[0]+self._left*(ALIEN_H_SEP+ALIEN_WIDTH)
+
+    def getRight(self):
+        """
+        Returns the x-coordinate of the rightmost living alien, or None if empty
+        """
+        if self.isEmpty():
+            return None
+        return self._origin[0]+self._right*(ALIEN_H_SEP+ALIEN_WIDTH)
+
+    def getBottom(self):
+        """
+        Returns the y-coordinate of the lowest living alien, or None if empty
+        """
+        if self.isEmpty():
+            return None
+        return self._origin[1]+self._bottom*(ALIEN_V_SEP+ALIEN_HEIGHT)
+
+    def getLiveColumns(self):
+        """
+        Returns the number of columns with at least one living alien
+        """
+        return len(self._columns)
+
+    def getLiveColumn(self,index):
+        """
+        Returns the column number of the live column at the given index
+
+        Live columns are kept in no particular order; the index only serves
+        to pick one, e.g. at random, in constant time.
+
+        Parameter index: the live column index
+        Precondition: index is an int in 0..getLiveColumns()-1
+        """
+        return self._columns[index]
+
+    def getLowest(self,col):
+        """
+        Returns the lowest row with a living alien in the given column
+
+        Parameter col: the alien column
+        Precondition: col is an int in 0.._cols-1 with a living alien
+        """
+        return int(self._lowest[col])
+
+    # INITIALIZER TO CREATE THE GRID OF ALIENS
+    def __init__(self,rows=ALIEN_ROWS,cols=ALIENS_IN_ROW):
+        """
+        Initializes a formation of rows x cols aliens.
+
+        The formation starts at the left edge of the screen, with its top row
+        ALIEN_CEILING pixels below the top of the window.
+
+        Parameter rows: the number of rows in the formation
+        Precondition: rows is an int > 0
+
+        Parameter cols: the number of aliens in each row
+        Precondition: cols is an int > 0
+        """
+        assert isinstance(rows,int) and rows > 0
+        assert isinstance(cols,int) and cols > 0
+        self._rows=rows
+        self._cols=cols
+
+        x0=ALIEN_H_SEP+ALIEN_WIDTH/2
+        y0=GAME_HEIGHT-((rows-1)*(ALIEN_HEIGHT+ALIEN_V_SEP)+ALIEN_CEILING)
+        xs=x0+np.arange(cols,dtype=float)*(ALIEN_H_SEP+ALIEN_WIDTH)
+        ys=y0+np.arange(rows,dtype=float)*(ALIEN_V_SEP+ALIEN_HEIGHT)
+        self._x,self._y=np.meshgrid(xs,ys)
+        self._origin=[x0,y0]
+        self._alive=np.ones((rows,cols),dtype=bool)
+        self._count=rows*cols
+        self._colcount=np.full(cols,rows,dtype=int)
+        self._rowcount=np.full(rows,cols,dtype=int)
+        self._columns=list(range(cols))
+        self._colindex=np.arange(cols)
+        self._lowest=np.zeros(cols,dtype=int)
+        self._left=0
+        self._right=cols-1
+        self._bottom=0
+
+        self._batches=[]
+        self._quads=[None]*rows
+        for k in range(len(ALIEN_IMAGES)):
+            images=[i for i in range(rows) if (i//2)%3 == k]
+            if len(images) == 0:
+                continue
+            batch=GSpriteBatch(source=ALIEN_IMAGES[k],capacity=len(images)*cols)
+            for i in images:
+                start=batch.extend(xs-x0,np.full(cols,ys[i]-y0),\
+                ALIEN_WIDTH,ALIEN_HEIGHT).start
+                self._quads[i]=(batch,start)
+            batch.x=float(x0)
+            batch.y=float(y0)
+            self._batches.append(batch)
+
+    # METHODS TO MOVE, KILL AND SHOW THE ALIENS
+    def march(self,dx,dy):
+        """
+        Moves every alien in the formation by (dx,dy)
+
+        Parameter dx: the horizontal distance to move
+        Precondition: dx is a number (int or float)
+
+        Parameter dy: the vertical distance to move
+        Precondition: dy is a number (int or float)
+        """
+        if dx:
+            self._x+=dx
+            self._origin[0]+=dx
+        if dy:
+            self._y+=dy
+            self._origin[1]+=dy
+        for batch in self._batches:
+            batch.x=float(self._origin[0])
+            batch.y=float(self._origin[1])
+
+    def kill(self,row,col):
+        """
+        Marks the alien at the given row and column as dead
+
+        The alive counts, the live columns and the formation bounds are
+        updated here. Moving a bound past an emptied column or row is
+        amortized constant time, as each bound only ever moves inwards.
+        An emptied column is swapped out of _columns in constant time.
+
+        Parameter row: the alien row
+        Precondition: row is an int in 0.._rows-1
+
+        Parameter col: the alien column
+        Precondition: col is an int in 0.._cols-1
+        """
+        if not self._alive[row,col]:
+            return
+        self._alive[row,col]=False
+        batch,start=self._quads[row]
+        batch.set_visible(start+col,False)
+        self._count-=1
+        self._colcount[col]-=1
+        self._rowcount[row]-=1
+        if self._colcount[col] == 0:
+            last=self._columns.pop()
+            if last != col:
+                self._columns[self._colindex[col]]=last
+                self._colindex[last]=self._colindex[col]
+        if self._count == 0:
+            return
+
+        if self._colcount[col] == 0:
+            while self._colcount[self._left] == 0:
+                self._left+=1
+            while self._colcount[self._right] == 0:
+                self._right-=1
+        else:
+            while not self._alive[self._lowest[col],col]:
+                self._lowest[col]+=1
+        while self._rowcount[self._bottom] == 0:
+            self._bottom+=1
+
+    def collides_many(self,xs,ys):
+        """
+        Returns the hits of many player bolts as a tuple (bolts,rows,cols)
+
+        Each of the three values is a numpy array of ints: bolt bolts[k] hit
+        the alien at (rows[k],cols[k]). As the formation is a regular grid,
+        the rows and columns that each bolt can overlap are computed directly
+        from its offset to the formation origin with np.floor, and only those
+        few grid cells are looked up in the alive mask. So the cost grows with
+        the number of bolts, not the size of the formation.
+
+        The result is resolved the same way each time: a bolt that overlaps
+        several aliens hits the lowest row (and then the leftmost column), and
+        an alien hit by several bolts is only hit by the first of them. The
+        hits are ordered by bolt. The aliens are not killed by this method.
+
+        Parameter xs: the x-coordinates of the player bolts
+        Precondition: xs is a 1d numpy array of numbers
+
+        Parameter ys: the y-coordinates of the player bolts
+        Precondition: ys is a 1d numpy array of numbers, the same length as xs
+        """
+        if len(xs) == 0 or self._count == 0:
+            none=np.empty(0,dtype=int)
+            return (none,none,none)
+
+        xpitch=ALIEN_H_SEP+ALIEN_WIDTH
+        ypitch=ALIEN_V_SEP+ALIEN_HEIGHT
+        xreach=(ALIEN_WIDTH+BOLT_WIDTH)/2
+        yreach=(ALIEN_HEIGHT+BOLT_HEIGHT)/2
+        dx=xs-self._origin[0]
+        dy=ys-self._origin[1]
+        # The first grid index strictly inside each overlap band
+        col0=np.floor((dx-xreach)/xpitch).astype(int)+1
+        row0=np.floor((dy-yreach)/ypitch).astype(int)+1
+
+        target=np.full(len(xs),-1)
+        for i in range(math.ceil(2*yreach/ypitch)):
+            rows=row0+i
+            inrow=(rows >= 0) & (rows < self._rows) & (np.abs(dy-rows*ypitch) < yreach)
+            for j in range(math.ceil(2*xreach/xpitch)):
+                cols=col0+j
+                cell=np.flatnonzero(inrow & (target < 0) & (cols >= 0) &
+                                    (cols < self._cols) & (np.abs(dx-cols*xpitch) < xreach))
+                cell=cell[self._alive[rows[cell],cols[cell]]]
+                target[cell]=rows[cell]*self._cols+cols[cell]
+
+        bolts=np.flatnonzero(target >= 0)
+        targets=target[bolts]
+        first=np.sort(np.unique(targets,return_index=True)[1])
+        rows,cols=np.divmod(targets[first],self._cols)
+        return (bolts[first],rows,cols)
+
+    def show(self,view):
+        """
+        Adds the living aliens in the formation to the view
+
+        They stay on screen, following the formation, until hidden.
+
+        Parameter view: the view to show the aliens in
+        Precondition: view is a GView object
+        """
+        for batch in self._batches:
+            view.add(batch)
+
+    def hide(self,view):
+        """
+        Removes the aliens in the formation from the view
+
+        Parameter view: the view showing the aliens
+        Precondition: view is a GView object
+        """
+        for batch in self._batches:
+            view.remove(batch)
 
 
-class Bolt(GRectangle):
+class BoltPool(object):
     """
-    A class representing a laser bolt.
+    A class representing every laser bolt on screen.
 
-    Laser bolts are often just thin, white rectangles. The size of the bolt
-    is determined by constants in consts.py. We MUST subclass GRectangle,
-    because we need to add an extra (hidden) attribute for the velocity of
-    the bolt.
+    The bolts are stored as a structure of arrays: one NumPy array each for
+    the x-coordinates, the y-coordinates, the velocities and the owners (the
+    player or the aliens). The live bolts are always packed into the first
+    _count slots. The arrays are preallocated and double in size whenever
+    they run out of room.
 
-    The class Wave will need to look at these attributes, so you will need
-    getters for them.  However, it is possible to write this assignment with
-    no setters for the velocities.  That is because the velocity is fixed and
-    cannot change once the bolt is fired.
+    Once a frame, step advances every bolt, culls the ones that left the
+    screen (through the top or the bottom) and compacts the arrays in a
+    single vectorized pass. Removing bolts after a collision is also one
+    compaction, however many bolts hit.
 
-    In addition to the getters, you need to write the __init__ method to set
-    the starting velocity. This __init__ method will need to call the __init__
-    from GRectangle as a  helper.
+    The pool never holds more than a fixed number of live bolts; new bolts
+    are refused at the limit. It also counts how many bolts were spawned,
+    culled offscreen and removed by collisions.
 
-    You also MIGHT want to create a method to move the bolt.  You move the
-    bolt by adding the velocity to the y-position.  However, the getter
-    allows Wave to do this on its own, so this method is not required.
+    The bolts are drawn with a single GSpriteBatch of solid quads, refilled
+    from the arrays each time the pool is interpolated.
     """
-    # INSTANCE ATTRIBUTES:
-    # Attribute _velocity: the velocity in y direction
-    # Invariant: _velocity is an int or float
+    # HIDDEN ATTRIBUTES:
+    # Attribute _count: the number of live bolts
+    # Invariant: _count is an int >= 0
+    #
+    # Attribute _x: the x-coordinate of every bolt
+    # Invariant: _x is a numpy array of floats, with at least _count elements
+    #
+    # Attribute _y: the y-coordinate of every bolt
+    # Invariant: _y is a numpy array of floats, the same size as _x
+    #
+    # Attribute _vel: the velocity (in y direction) of every bolt
+    # Invariant: _vel is a numpy array of floats, the same size as _x
+    #
+    # Attribute _player: whether every bolt was fired by the player
+    # Invariant: _player is a numpy array of bools, the same size as _x
+    #
+    # Attribute _limit: the maximum number of live bolts
+    # Invariant: _limit is an int > 0
+    #
+    # Attribute _spawned: the number of bolts added to the pool
+    # Invariant: _spawned is an int >= 0
+    #
+    # Attribute _culled: the number of bolts removed for leaving the screen
+    # Invariant: _culled is an int >= 0
+    #
+    # Attribute _collided: the number of bolts removed by collisions
+    # Invariant: _collided is an int >= 0
+    #
+    # Attribute _scale: the fraction of its velocity each bolt moved in the last step
+    # Invariant: _scale is a float > 0
+    #
+    # Attribute _batch: the sprite batch used to draw the bolts
+    # Invariant: _batch is a GSpriteBatch object without a source
+
+    # GETTERS AND SETTERS
+    def getCount(self):
+        """
+        Returns the number of live bolts
+        """
+        return self._count
 
-    # LIST MORE ATTRIBUTES (AND THEIR INVARIANTS) HERE IF NECESSARY
-    #Attribute _trackvel: keeps track of velocity (up or down)
-    #Invariant: _trackvel is 0(up- playerbolt) or 1(down- alienbolt)
+    def getPositions(self,indices):
+        """
+        Returns the positions of the given bolts as a tuple (xs,ys) of numpy arrays
 
-    # GETTERS AND SETTERS (ONLY ADD IF YOU NEED THEM)
-    def getBolt(self):
-        return self._bolt
-    def getBoltVel(self):
-        return self._velocity
-    # INITIALIZER TO SET THE VELOCITY
-    def __init__(self,x,y,velocity,fillcolor):
-        assert isinstance(x,int) or isinstance(x,float)
-        assert isinstance(y,int) or isinstance(y,float)
-        assert isinstance(velocity,int) or isinstance(velocity,float)
-        super().__init__(x=x,y=y, width=BOLT_WIDTH,height= BOLT_HEIGHT,\
-        fillcolor=fillcolor)
-        self._velocity=velocity
-        self._trackvel=0
-    # ADD MORE METHODS (PROPERLY SPECIFIED) AS NECESSARY
-    def isPlayerBolt(self):
-        '''
-        Checks if the given bolt is fired by a player
-        '''
-        if self._velocity>0:
-            return True
-# IF YOU NEED ADDITIONAL MODEL CLASSES, THEY GO HERE
+        Parameter indices: the bolt slots
+        Precondition: indices is a 1d numpy array of ints in 0.._count-1
+        """
+        return (self._x[indices],self._y[indices])
+
+    def hasPlayerBolt(self):
+        """
+        Returns True if there is a live player bolt
+        """
+        return bool(self._player[:self._count].any())
+
+    def getLimit(self):
+        """
+        Returns the maximum number of live bolts
+        """
+        return self._limit
+
+    def getSpawned(self):
+        """
+        Returns the number of bolts added to the pool
+        """
+        return self._spawned
+
+    def getCulled(self):
+        """
+        Returns the number of bolts removed for leaving the screen
+        """
+        return self._culled
+
+    def getCollided(self):
+        """
+        Returns the number of bolts removed by collisions
+        """
+        return self._collided
+
+    # INITIALIZER TO CREATE AN EMPTY POOL
+    def __init__(self,capacity=64,limit=BOLT_LIMIT):
+        """
+        Initializes an empty pool of bolts
+
+        Parameter capacity: the number of slots to preallocate
+        Precondition: capacity is an int > 0
+
+        Parameter limit: the maximum number of live bolts
+        Precondition: limit is an int > 0
+        """
+        assert isinstance(capacity,int) and capacity > 0
+        assert isinstance(limit,int) and limit > 0
+        self._count=0
+        self._limit=limit
+        self._spawned=0
+        self._culled=0
+        self._collided=0
+        self._scale=1.0
+        self._x=np.zeros(capacity)
+        self._y=np.zeros(capacity)
+        self._vel=np.zeros(capacity)
+        self._player=np.zeros(capacity,dtype=bool)
+        self._batch=GSpriteBatch(capacity=capacity)
+
+    # METHODS TO ADD, MOVE, REMOVE AND DRAW BOLTS
+    def add(self,x,y,velocity):
+        """
+        Adds a new bolt at (x,y), returning True if it was added
+
+        A bolt with a positive velocity belongs to the player. If the pool is
+        already at its limit, the bolt is not added and this returns False.
+
+        Parameter x: the x-coordinate of the bolt
+        Precondition: x is a number (int or float)
+
+        Parameter y: the y-coordinate of the bolt
+        Precondition: y is a number (int or float)
+
+        Parameter velocity: the velocity in y direction
+        Precondition: velocity is a nonzero number (int or float)
+        """
+        if self._count >= self._limit:
+            return False
+        if self._count == len(self._x):
+            self._grow()
+        n=self._count
+        self._x[n]=x
+        self._y[n]=y
+        self._vel[n]=velocity
+        self._player[n]=velocity > 0
+        self._count+=1
+        self._spawned+=1
+        return True
+
+    def select(self,player,bottom=None,top=None):
+        """
+        Returns the slots of the bolts of one owner, as a numpy array
+
+        If bottom or top are given, only bolts with bottom < y < top are
+        selected.
+
+        Parameter player: whether to select player bolts (or alien bolts)
+        Precondition: player is a bool
+
+        Parameter bottom: the lower limit of the y-band
+        Precondition: bottom is a number or None
+
+        Parameter top: the upper limit of the y-band
+        Precondition: top is a number or None
+        """
+        n=self._count
+        mask=self._player[:n] == player
+        if bottom is not None:
+            mask&=self._y[:n] > bottom
+        if top is not None:
+            mask&=self._y[:n] < top
+        return np.flatnonzero(mask)
+
+    def step(self,scale=1.0):
+        """
+        Advances every bolt and removes the bolts that left the screen
+
+        This is a single vectorized pass: the bolts are moved, the ones that
+        are entirely above the top or below the bottom of the window are
+        culled and the survivors are compacted.
+
+        Parameter scale: the fraction of its velocity each bolt moves
+        Precondition: scale is a number > 0
+        """
+        self._scale=scale
+        n=self._count
+        y=self._y[:n]
+        y+=self._vel[:n]*scale
+        keep=(y-BOLT_HEIGHT/2 <= GAME_HEIGHT) & (y+BOLT_HEIGHT/2 >= 0)
+        self._culled+=self._compact(keep)
+
+    def remove(self,indices):
+        """
+        Removes the bolts in the given slots after a collision
+
+        Parameter indices: the slots to remove
+        Precondition: indices is a sequence of ints in 0.._count-1
+        """
+        if len(indices) == 0:
+            return
+        keep=np.ones(self._count,dtype=bool)
+        keep[np.asarray(indices,dtype=int)]=False
+        self._collided+=self._compact(keep)
+
+    def show(self,view):
+        """
+        Adds the bolts to the view
+
+        They stay on screen until hidden, where interpolate last put them.
+
+        Parameter view: the view to show the bolts in
+        Precondition: view is a GView object
+        """
+        view.add(self._batch)
+
+    def hide(self,view):
+        """
+        Removes the bolts from the view
+
+        Parameter view: the view showing the bolts
+        Precondition: view is a GView object
+        """
+        view.remove(self._batch)
+
+    def interpolate(self,alpha=1.0):
+        """
+        Moves the drawing of every live bolt to where it is shown this frame
+
+        Each bolt is drawn between its position before and after the last
+        step, alpha of the way to the latter.
+
+        Parameter alpha: how far to interpolate into the last step
+        Precondition: alpha is a number in 0..1
+        """
+        n=self._count
+        if n == 0 and self._batch.count == 0:
+            return
+        ys=self._y[:n]
+        if alpha != 1.0:
+            ys=ys-(1.0-alpha)*self._scale*self._vel[:n]
+        player=self._player[:n]
+        self._batch.clear()
+        self._batch.extend(self._x[:n][player],ys[player],\
+        BOLT_WIDTH,BOLT_HEIGHT,tint='blue')
+        self._batch.extend(self._x[:n][~player],ys[~player],\
+        BOLT_WIDTH,BOLT_HEIGHT,tint='red')
+
+    def _compact(self,keep):
+        """
+        Packs the bolts marked in keep into the first slots
+
+        This method returns the number of bolts removed.
+
+        Parameter keep: which of the live bolts to keep
+        Precondition: keep is a numpy array of _count bools
+        """
+        n=self._count
+        m=int(keep.sum())
+        if m == n:
+            return 0
+        self._x[:m]=self._x[:n][keep]
+        self._y[:m]=self._y[:n][keep]
+        self._vel[:m]=self._vel[:n][keep]
+        self._player[:m]=self._player[:n][keep]
+        self._count=m
+        return n-m
+
+    def _grow(self):
+        """
+        Doubles the number of slots in the pool
+        """
+        size=2*len(self._x)
+        self._x=np.resize(self._x,size)
+        self._y=np.resize(self._y,size)
+        self._vel=np.resize(self._vel,size)
+        self._player=np.resize(self._player,size)
@@ -0,0 +1,58 @@
+"""
+Tests for the vectorized containment checks in game2d.gpath.
+
+The checks are compared against a brute-force reference that uses exact barycentric
+coordinates, one point and one triangle at a time.
+
+Run from the package root with ``python -m pytest invaders/tests``.
+"""
+import os, sys
+from fractions import Fraction
+import random
+
+os.environ.setdefault('KIVY_NO_ARGS','1')
+os.environ.setdefault('KIVY_NO_CONSOLELOG','1')
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),'..'))
+
+import numpy as np
+from game2d.gpath import in_triangles, GTriangle, GPolygon
+
+
+def reference(p, t):
+    """
+    Returns True if point p is in triangle t, edges included.
+
+    A degenerate triangle contains no points.
+    """
+    ax, ay, bx, by, cx, cy = (Fraction(v) for v in t)
+    px, py = Fraction(p[0]), Fraction(p[1])
+    det = (by-cy)*(ax-cx)+(cx-bx)*(ay-cy)
+    if det == 0:
+        return False
+    l1 = ((by-cy)*(px-cx)+(cx-bx)*(py-cy))/det
+    l2 = ((cy-ay)*(px-cx)+(ax-cx)*(py-cy))/det
+    return l1 >= 0 and l2 >= 0 and 1-l1-l2 >= 0
+
+
+def test_in_triangles():
+    rand = random.Random(1110)
+    tris = [[rand.randint(-10,10) for _ in range(6)] for _ in range(200)]
+    tris += [[0,0,5,5,10,10],[0,0,0,0,4,0],[3,3,3,3,3,3]]
+    pts = [(rand.randint(-12,12),rand.randint(-12,12)) for _ in range(300)]
+    xs = np.array([p[0] for p in pts],dtype=float)
+    ys = np.array([p[1] for p in pts],dtype=float)
+    mask = in_triangles(xs,ys,np.array(tris,dtype=float))
+    for i, p in enumerate(pts):
+        for j, t in enumerate(tris):
+            assert mask[i,j] == reference(p,t), (p,t)
+
+
+def test_degenerate_triangle():
+    tri = GTriangle(points=(0,0,5,5,10,10))
+    assert not tri.contains_many([[50,-50],[5,5],[0,0]]).any()
+
+
+def test_polygon():
+    poly = GPolygon(points=(0,0,10,0,10,10,0,10))
+    pts = [[5,5],[50,50],[-20,3],[10,10],[0,5],[11,5],[5,-1]]
+    assert poly.contains_many(pts).tolist() == [True,False,False,True,True,False,False]
@@ -54,21 +54,30 @@ class Wave(object):
     # Attribute _ship: the player ship to control
     # Invariant: _ship is a Ship object or None
     #
-    # Attribute _aliens: the 2d list of aliens in the wave
-    # Invariant: _aliens is a rectangular 2d list containing Alien objects or None
+    # Attribute _aliens: the formation of aliens in the wave
+    # Invariant: _aliens is a Formation object
     #
     # Attribute _bolts: the laser bolts currently on screen
-    # Invariant: _bolts is a list of Bolt objects, possibly empty
+    # Invariant: _bolts is a BoltPool object, possibly empty
     #
     # Attribute _dline: the defensive line being protected
     # Invariant : _dline is a GPath object
     #
+    # Attribute _static: the parts of the wave that never move, rendered offscreen
+    # Invariant : _static is a GLayer object covering the window, containing _dline
+    #
+    # Attribute _view: the view showing the wave
+    # Invariant: _view is a GView object, or None if the wave is not shown
+    #
     # Attribute _lives: the number of lives left
     # Invariant: _lives is an int >= 0
     #
     # Attribute _time: the amount of time since the last Alien "step"
     # Invariant: _time is a float >= 0s
     #
+    # Attribute _speed: the number of seconds between Alien "steps"
+    # Invariant: _speed is a float >= 0s
+    #
     # You may change any attribute above, as long as you update the invariant
     # You may also add any new attributes as long as you document them.
     # LIST MORE ATTRIBUTES (AND THEIR INVARIANTS) HERE IF NECESSARY
@@ -85,6 +94,15 @@ class Wave(object):
 
     #Attribute _winner: result of the game (Win or Lose)
     #Invariant: _winner is a bool either True (Win)/ False (Defeat) or None
+    #
+    #Attribute _accum: simulation time not yet consumed by a tick
+    #Invariant: _accum is a float >= 0 (less than TICK_TIME after an update)
+    #
+    #Attribute _shipx: the ship x-coordinate after the previous and the last tick
+    #Invariant: _shipx is a list of two floats (only meaningful if _ship is not None)
+    #
+    #Attribute _fire: whether the player pressed fire since the last tick
+    #Invariant: _fire is a bool
     # GETTERS AND SETTERS (ONLY ADD IF YOU NEED THEM)
     def getShip(self):
         """
@@ -121,35 +139,115 @@ class Wave(object):
 
     def setWinner(self,value):
         self._winner=value
+
+    def getBolts(self):
+        """
+        Returns the laser bolts on screen
+        """
+        return self._bolts
+
+    def getBoltCounts(self):
+        """
+        Returns the bolts (spawned, culled, collided) so far in this wave
+        """
+        return (self._bolts.getSpawned(),self._bolts.getCulled(),\
+        self._bolts.getCollided())
     # INITIALIZER (standard form) TO CREATE SHIP AND ALIENS
-    def __init__(self):
+    def __init__(self,rows=ALIEN_ROWS,cols=ALIENS_IN_ROW,speed=ALIEN_SPEED):
+        '''
+        Initializes a wave with a formation of rows x cols aliens.
+
+        The defaults come from consts.py, but larger formations may be given
+        directly (for instance, when measuring performance).
+
+        Parameter rows: the number of rows of aliens
+        Precondition: rows is an int > 0
+
+        Parameter cols: the number of aliens in each row
+        Precondition: cols is an int > 0
+
+        Parameter speed: the number of seconds between alien steps
+        Precondition: speed is a number (int or float) >= 0
+        '''
+        assert isinstance(speed,int) or isinstance(speed,float)
+        assert speed >= 0
+        self._view=None
+        self._ship=None
         #intializing aliens
-        self._aliens=[]
-        self.aliens_in_wave()
-        self._ship=Ship(x=GAME_WIDTH/2,y=SHIP_BOTTOM)
+        self.aliens_in_wave(rows,cols)
+        self.createship()
         self._dline=GPath(linewidth=2,points=[0,DEFENSE_LINE,\
         GAME_WIDTH,DEFENSE_LINE],linecolor='black')
+        self._static=GLayer(left=0,bottom=0,width=GAME_WIDTH,height=GAME_HEIGHT,\
+        children=[self._dline])
         self._time=0
+        self._speed=speed
         self._trackmov= 0
-        self._bolts=[]
+        self._bolts=BoltPool()
         self._lives=SHIP_LIVES
         self._bolttime=0
         self._flagcollides=0
         self._gameover= False
         self._winner= None
+        self._accum=0.0
+        self._fire=False
 
     # UPDATE METHOD TO MOVE THE SHIP, ALIENS, AND LASER BOLTS
     def update(self,input,dt):
+        '''
+        Advances the wave by dt seconds.
+
+        The simulation runs in fixed ticks of TICK_TIME seconds, however long
+        the frame was, so gameplay does not depend on the frame rate. Time
+        left over is carried to the next frame, and is used by draw to
+        interpolate between the last two ticks. At most MAX_TICKS ticks run
+        per frame; any whole ticks beyond that are dropped. The ticks stop
+        early when the ship is hit or the game ends, and the rest of the
+        frame is dropped, so it is not played after the pause.
+
+        The ship is kept inside the window on every tick. This changes the
+        gameplay slightly: the app used to clamp it only at the start of the
+        next frame, so the ship could be drawn past the edge for a frame.
+
+        Parameter input: the user input
+        Precondition: input is a GInput object
+
+        Parameter dt: The time in seconds since last update
+        Precondition: dt is a number (int or float) >= 0
+        '''
+        if self._ship != None:
+            self._ship.x=self._shipx[1]
+        if input.is_key_pressed('up') or input.is_key_pressed('space'):
+            self._fire=True
+
+        self._accum+=dt
+        ticks=0
+        while self._accum >= TICK_TIME:
+            if ticks == MAX_TICKS:
+                # Too far behind to catch up: keep only the partial tick
+                self._accum%=TICK_TIME
+                break
+            self.tick(input)
+            self._accum-=TICK_TIME
+            ticks+=1
+            if self._flagcollides or self._gameover:
+                # The wave pauses (or ends) here; drop the rest of the frame
+                self._accum=0.0
+                break
+
+    #Helper to advance the simulation by one fixed tick
+    def tick(self,input):
+        if self._ship != None:
+            self._shipx[0]=self._ship.x
         #SHIP MOVEMENT
         self.shipmove(input)
         #Create PlayerBolt when up arrow pressed
-        self.playerbolt(input)
-        #Moving player bolts
-        for bolt in self._bolts:
-            bolt.y+=bolt.getBoltVel()
+        self.playerbolt()
+        #Moving bolts and deleting bolts offscreen
+        self._bolts.step(TICK_SCALE)
 
         #ALIENS MOVEMENT
-        self.aliensmov(dt)
+        self.aliensmov(TICK_TIME)
         #FIRING & MOVING ALIEN BOLTS
         t= random.randint(1,BOLT_RATE)
         if self._bolttime>=BOLT_RATE:
@@ -160,73 +258,88 @@ class Wave(object):
             #FIRE Bolt
             self.alienbolt()
             self._bolttime=0
-
-        #Deleting bolts offscreen
-        self.removbolt()
         #Checking collisions
         self.checkcollision()
 
 
-    # DRAW METHOD TO DRAW THE SHIP, ALIENS, DEFENSIVE LINE AND BOLTS
+    # METHODS TO SHOW AND DRAW THE SHIP, ALIENS, DEFENSIVE LINE AND BOLTS
+    def show(self,view):
+        '''
+        Adds the wave to the view, where it stays until hidden.
+
+        Parameter view: the view to show the wave in
+        Precondition: view is a GView object
+        '''
+        if self._view != None:
+            return
+        self._view=view
+        self._aliens.show(view)
+        if self._ship != None:
+            view.add(self._ship)
+        view.add(self._static)
+        self._bolts.show(view)
+
+    def hide(self,view):
+        '''
+        Removes the wave from the view.
+
+        Parameter view: the view showing the wave
+        Precondition: view is a GView object
+        '''
+        self._aliens.hide(view)
+        if self._ship != None:
+            view.remove(self._ship)
+        view.remove(self._static)
+        self._bolts.hide(view)
+        self._view=None
+
     def draw(self,view):
-        for row in self._aliens:
-            for alien in row:
-                if alien != None:
-                    alien.draw(view)
+        '''
+        Brings the shown wave up to date for this frame.
+
+        The ship and bolts are interpolated between ticks.  The aliens are
+        not, as they march in discrete steps.
+
+        Parameter view: the view showing the wave
+        Precondition: view is a GView object
+        '''
+        alpha=min(self._accum/TICK_TIME,1.0)
         if self._ship != None:
-            self._ship.draw(view)
-        self._dline.draw(view)
-        for bolt in self._bolts:
-            bolt.draw(view)
+            prev,last=self._shipx
+            self._ship.x=prev+alpha*(last-prev)
+        self._bolts.interpolate(alpha)
 
     #Helper for ship movement
     def shipmove(self,input):
+        if self._ship == None:
+            return
         if input.is_key_down('left'):
-            if self._ship != None:
-                self._ship.x-=SHIP_MOVEMENT
+            self._ship.x-=SHIP_MOVEMENT*TICK_SCALE
         if input.is_key_down('right'):
-            if self._ship != None:
-                self._ship.x += SHIP_MOVEMENT
+            self._ship.x += SHIP_MOVEMENT*TICK_SCALE
+        self._ship.x=min(max(self._ship.x,SHIP_WIDTH/2),GAME_WIDTH-SHIP_WIDTH/2)
+        self._shipx[1]=self._ship.x
     #Helper for aliens movement
     def aliensmov(self,dt):
-        if self._time>ALIEN_SPEED:
+        if self._time>self._speed:
             if self._trackmov== 0:
                 self.alien_f()
                 self._time=0
             if self._trackmov==1:
                 self.alien_b()
                 self._time=0
-            self._bolttime+=ALIEN_SPEED
+            self._bolttime+=self._speed
         else:
             self._time+=dt
 
 
     #Helper for finding number of columns
     def number_col(self):
-        count_col=0
-        for i in range(0,ALIENS_IN_ROW):
-            count_aliens=0
-            for row in self._aliens:
-                if row[i]==None:
-                    count_aliens+=1
-            if count_aliens != ALIEN_ROWS:
-                count_col+=1
-        return count_col
+        return self._aliens.getLiveColumns()
 
     #Helper for creating alien wave
-    def aliens_in_wave(self):
-        x= ALIEN_H_SEP+ALIEN_WIDTH/2
-        y=GAME_HEIGHT-((ALIEN_ROWS-1)*(ALIEN_HEIGHT+ALIEN_V_SEP)+ALIEN_CEILING)
-        for i in range(ALIEN_ROWS):
-            a_row=[]
-            for j in range(ALIENS_IN_ROW):
-                a_row.append(Alien(x,y,source=ALIEN_IMAGES[(i//2)%3]))
-                x=x+ALIEN_H_SEP+ALIEN_WIDTH
-            x=ALIEN_H_SEP + ALIEN_WIDTH/2
-            self._aliens.append(a_row)
-            y=y + ALIEN_V_SEP + ALIEN_HEIGHT
-
-
+    def aliens_in_wave(self,rows=ALIEN_ROWS,cols=ALIENS_IN_ROW):
+        self._aliens=Formation(rows,cols)
 
     #Helper for moving aliens to the right
     def alien_f(self):
@@ -237,43 +350,19 @@ class Wave(object):
                check if lowest row touch defense line - game over
         Task3: change _trackmov=1
         '''
-        flag_f=0
         r_alien = self.rightmost()
-        for wave in self._aliens:
-            if r_alien is not None:
-                if r_alien.x >= GAME_WIDTH-(ALIEN_H_SEP+ALIEN_WIDTH/2):
-                    flag_f=1
-                    break
-        if flag_f==1:
+        if r_alien is not None and r_alien >= GAME_WIDTH-(ALIEN_H_SEP+ALIEN_WIDTH/2):
             #DO TASK 2
-            for wave in self._aliens:
-                for alien in wave:
-                    if self.down_valid() and (alien is not None):
-                        alien.y-=ALIEN_V_WALK
-                    if not self.down_valid():
-                        self._gameover=True
-                        self._winner=False
+            self.alien_down()
             #DO TASK 3
             self._trackmov=1
-
         else:
             #DO TASK 1
-            for wave in self._aliens:
-                for alien in wave:
-                    if alien is not None:
-                        alien.x+=ALIEN_H_WALK
+            self._aliens.march(ALIEN_H_WALK,0)
 
-    #Finding rightmost alien when aliens moving forward
+    #Finding x-coordinate of rightmost alien when aliens moving forward
     def rightmost(self):
-        rightmost_alien = None
-        for row in self._aliens:
-            for alien in row:
-                if alien is not None:
-                    rightmost_alien = alien
-        return rightmost_alien
-
-
-
+        return self._aliens.getRight()
 
     #Helper for moving aliens to the left
     def alien_b(self):
@@ -284,142 +373,93 @@ class Wave(object):
                check if lowest row touch defense line - game over
         Task3: change _trackmov=0
         '''
-        flag_b=0
         l_alien = self.leftmost()
-        if l_alien is not None:
-            if l_alien.x <= ALIEN_H_SEP+ALIEN_WIDTH/2:
-                flag_b=1
-
-        if flag_b==1:
+        if l_alien is not None and l_alien <= ALIEN_H_SEP+ALIEN_WIDTH/2:
             #DO TASK 2
-            for wave in self._aliens:
-                for alien in wave:
-                    if self.down_valid() and (alien is not None):
-                        alien.y-=ALIEN_V_WALK
-                    if not self.down_valid():
-                        self._gameover=True
-                        self._winner=False
+            self.alien_down()
             #DO TASK 3
             self._trackmov=0
         else:
             #DO TASK 1
-            for wave in self._aliens:
-                for alien in wave:
-                    if alien is not None:
-                        alien.x-=ALIEN_H_WALK
+            self._aliens.march(-ALIEN_H_WALK,0)
 
-    #Helper for finding leftmost element when aliens moving backward
+    #Finding x-coordinate of leftmost alien when aliens moving backward
     def leftmost(self):
-        leftmost_alien = None
-        for row in self._aliens:
-            for alien in row:
-                if alien is not None:
-                    leftmost_alien = alien
-                    break  # Break once the leftmost alien in the row is found
-        return leftmost_alien
-
-
+        return self._aliens.getLeft()
 
+    #Helper for moving every alien down a step at a wall
+    def alien_down(self):
+        '''
+        Moves the formation down, ending the game if it crosses the defense line
+        '''
+        if self.down_valid():
+            self._aliens.march(0,-ALIEN_V_WALK)
+        if not self.down_valid():
+            self._gameover=True
+            self._winner=False
 
     #Helper for checking if any alien has crossed the defense line
     def down_valid(self):
         '''
-        Checking if the any wave has crossed defense line or not
+        Checking if the lowest living alien has crossed defense line or not
         '''
-        for wave in self._aliens:
-            for alien in wave:
-                if alien is not None:
-                    if alien.y < DEFENSE_LINE + ALIEN_HEIGHT/2:
-                        return 0
-                    else:
-                        return 1
-
-    #Helper for deleting bolts going offscreen from the list _bolts
-    def removbolt(self):
-        i = 0
-        while i < len(self._bolts):
-            if self._bolts[i].y > GAME_HEIGHT:
-                del self._bolts[i]
-            else:
-                i += 1
+        bottom=self._aliens.getBottom()
+        if bottom is not None and bottom < DEFENSE_LINE + ALIEN_HEIGHT/2:
+            return 0
+        return 1
 
     #Helper for checking there is only one playerbolt
-    def playerbolt(self, input):
-        x=True
-        if self._ship !=None:
-            for bolt in self._bolts:
-                if bolt.isPlayerBolt():
-                    x=False
-            if x and (input.is_key_pressed('up') or input.is_key_pressed('space')):
-                bolt=Bolt(x=self._ship.x,y=SHIP_HEIGHT/2 + SHIP_BOTTOM, \
-                velocity=BOLT_SPEED,fillcolor='blue')
-                self._bolts.append(bolt)
+    def playerbolt(self):
+        if self._fire and self._ship !=None and not self._bolts.hasPlayerBolt():
+            self._bolts.add(self._ship.x,SHIP_HEIGHT/2 + SHIP_BOTTOM,BOLT_SPEED)
+        self._fire=False
 
 
     #Helper for choosing random bottomost alien and firing bolt
     def alienbolt(self):
-        # randcol=random.randint(1,len(self._aliens[0])-1)
-        # for row in self._aliens:
-        #     for alien in self._aliens[][randcol]:
-        alienb_flag=1
-        l=[]
-        while alienb_flag:
-            randcol=random.randint(0,len(self._aliens[0])-1)
-            for rows in self._aliens:
-                if rows[randcol] != None:
-                    alienb_flag=0
-                l.append(rows[randcol])
-        for i in range(0,len(l)-1,1):
-            if self._aliens[i][randcol]!=None:
-                self._bolts.append(Bolt(x=self._aliens[i][randcol].x,\
-                y=self._aliens[i][randcol].y -(ALIEN_HEIGHT/2 + BOLT_HEIGHT/2),\
-                velocity=-BOLT_SPEED,fillcolor='red'))
-                break
-
-
-    #Helper for finding a random column that is not None
-    def NoneCol(self):
-        random_flag=1
-        while flag:
-            randcol=random.randint(1,len(self._aliens[0])-1)
-            for rows in self._aliens:
-                if rows[randcol] is not None:
-                    random_flag=0
+        if self._aliens.isEmpty():
+            return
+        col=self._aliens.getLiveColumn(random.randrange(self._aliens.getLiveColumns()))
+        row=self._aliens.getLowest(col)
+        x,y=self._aliens.getPosition(row,col)
+        self._bolts.add(x,y -(ALIEN_HEIGHT/2 + BOLT_HEIGHT/2),-BOLT_SPEED)
 
 
     # HELPER METHODS FOR COLLISION DETECTION
     def checkcollision(self):
-        for bolt in self._bolts:
-            #alien collisions
-            if bolt.isPlayerBolt():
-                for row in range(ALIEN_ROWS):
-                    for alien in range(ALIENS_IN_ROW):
-                        if self._aliens[row][alien] is not None:
-                                if self._aliens[row][alien].collides(bolt):
-                                    self._aliens[row][alien] = None
-                                    self._bolts.remove(bolt)
-                                    if self.checkaliens():
-                                        self._gameover=True
-                                        self._winner=1
-
-            #ship collisions
-            if not bolt.isPlayerBolt():
-                for bolt in self._bolts:
-                    if self._ship !=None:
-                        if self._ship.collides(bolt):
-                            self._flagcollides=1
-                            self._ship=None
-                            self._bolts.remove(bolt)
-                            self._lives-=1
+        spent=[]
+        #alien collisions, for all player bolts at once
+        player=self._bolts.select(True)
+        bolts,rows,cols=self._aliens.collides_many(*self._bolts.getPositions(player))
+        for k in range(len(bolts)):
+            self._aliens.kill(int(rows[k]),int(cols[k]))
+            spent.append(int(player[bolts[k]]))
+        if len(bolts) and self.checkaliens():
+            self._gameover=True
+            self._winner=1
+
+        #ship collisions (only bolts in the ship's y-band can hit it)
+        if self._ship !=None:
+            band=(SHIP_HEIGHT+BOLT_HEIGHT)/2
+            alien=self._bolts.select(False,self._ship.y-band,self._ship.y+band)
+            hits=alien[self._ship.collides_many(*self._bolts.getPositions(alien))]
+            if len(hits):
+                self._flagcollides=1
+                if self._view != None:
+                    self._view.remove(self._ship)
+                self._ship=None
+                spent.append(int(hits[0]))
+                self._lives-=1
+        self._bolts.remove(spent)
     #Helper for creating a ship object
     def createship(self):
+        if self._ship != None and self._view != None:
+            self._view.remove(self._ship)
         self._ship=Ship(x=GAME_WIDTH/2,y=SHIP_BOTTOM)
+        if self._view != None:
+            self._view.add(self._ship)
+        self._shipx=[self._ship.x,self._ship.x]
 
     #Helper for when all aliens are killed
     def checkaliens(self):
-        flag_aliens=True
-        for row in self._aliens:
-            for alien in row:
-                if alien is not None:
-                    flag_aliens= False
-        return flag_aliens
+        return self._aliens.isEmpty()